@@ -0,0 +1,182 @@
+"""Benchmarks of the hot paths of xfeltor
+
+Times and memory-profiles opening, restart deduplication, color limits, frame
+rendering and export on a synthetic run (see synthetic.py) and compares the
+results with a stored baseline:
+
+    python benchmarks/run.py                       # small run, compare baseline
+    python benchmarks/run.py --size medium
+    python benchmarks/run.py --save-baseline       # store the current results
+
+The exit status is 1 if a benchmark is slower or uses more memory than the
+baseline by more than the tolerance. Timings depend on the machine, so the
+baseline should be stored on the machine that runs the comparison.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+import warnings
+import matplotlib.pyplot as plt
+import xarray as xr
+from xfeltor import open_feltordataset
+from xfeltor.load import _expand_paths, _trim_restart_overlap
+from xfeltor.plotting import animate_pcolormesh, _find_limits
+from xfeltor.export import _draw_frame
+from synthetic import write_run
+
+SIZES = {
+    "small": dict(files=2, frames=20, nx=128, ny=128),
+    "medium": dict(files=4, frames=100, nx=512, ny=512),
+    "large": dict(files=8, frames=500, nx=1024, ny=1024),
+}
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def measure(func, repeat=3):
+    """Return the fastest wall time of repeat calls of func and the peak of the
+    memory traced during one more call. The memory is traced separately, since
+    tracing slows down the calls considerably."""
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": min(seconds), "peak_bytes": peak}
+
+
+def benchmarks(pattern, directory, frames):
+    """Return the benchmark functions by name for the run matching pattern"""
+
+    def open_run(**kwargs):
+        open_feltordataset(pattern, **kwargs).close()
+
+    def dedup():
+        datasets = [
+            xr.open_dataset(path, chunks={}, decode_times=False)
+            for path in _expand_paths(pattern)
+        ]
+        xr.combine_nested(
+            _trim_restart_overlap(datasets, "time"),
+            concat_dim="time",
+            combine_attrs="override",
+        )
+        for ds in datasets:
+            ds.close()
+
+    def minmax():
+        with open_feltordataset(pattern) as ds:
+            _find_limits(ds["electrons"])
+
+    def render():
+        with open_feltordataset(pattern) as ds:
+            anim = animate_pcolormesh(ds["electrons"], lazy=True, max_frames=frames)
+            for i in range(frames):
+                _draw_frame(anim, i)
+            plt.close(anim.fig)
+
+    def export():
+        with open_feltordataset(pattern) as ds:
+            animate_pcolormesh(
+                ds["electrons"],
+                lazy=True,
+                max_frames=frames,
+                save_as=os.path.join(directory, "export"),
+            )
+            plt.close("all")
+
+    return {
+        "open": open_run,
+        "open_parallel": lambda: open_run(parallel=True),
+        "dedup": dedup,
+        "minmax": minmax,
+        "render": render,
+        "export": export,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Print the results next to the baseline and return the names of the
+    benchmarks which regressed by more than the factor tolerance"""
+    regressions = []
+    print(
+        f"{'benchmark':<15}{'seconds':>10}{'baseline':>10}{'MiB':>10}{'baseline':>10}"
+    )
+    for name, result in results.items():
+        base = baseline.get(name)
+        line = f"{name:<15}{result['seconds']:>10.3f}"
+        if base is None:
+            print(line + f"{'-':>10}{result['peak_bytes'] / 2**20:>10.1f}{'-':>10}")
+            continue
+        line += f"{base['seconds']:>10.3f}"
+        line += (
+            f"{result['peak_bytes'] / 2**20:>10.1f}{base['peak_bytes'] / 2**20:>10.1f}"
+        )
+        if (
+            result["seconds"] > tolerance * base["seconds"]
+            or result["peak_bytes"] > tolerance * base["peak_bytes"]
+        ):
+            regressions.append(name)
+            line += "  REGRESSION"
+        print(line)
+    return regressions
+
+
+def main(argv=None):
+    # Render without a display
+    plt.switch_backend("Agg")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=SIZES, default="small")
+    for option in ["files", "frames", "nx", "ny"]:
+        parser.add_argument(f"--{option}", type=int, help="overrides --size")
+    parser.add_argument("--render-frames", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", help="names of benchmarks to run")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    size = dict(SIZES[args.size])
+    size.update(
+        {key: getattr(args, key) for key in size if getattr(args, key) is not None}
+    )
+    key = "{files}x{frames}x{ny}x{nx}".format(**size)
+
+    warnings.filterwarnings("ignore", "Animation was deleted", UserWarning)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        pattern = write_run(directory, **size)
+        for name, func in benchmarks(pattern, directory, args.render_frames).items():
+            if args.only and name not in args.only:
+                continue
+            results[name] = measure(func, args.repeat)
+
+    stored = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+    regressions = compare(results, stored.get(key, {}), args.tolerance)
+
+    if args.save_baseline:
+        stored[key] = results
+        with open(args.baseline, "w") as f:
+            json.dump(stored, f, indent=2)
+        print(f"Stored the results as baseline for {key} in {args.baseline}")
+    elif regressions:
+        print(f"Regressions compared to the baseline: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
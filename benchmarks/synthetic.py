@@ -0,0 +1,54 @@
+"""Synthetic FELTOR-shaped output for the benchmarks
+
+write_run creates a restarted simulation: several netCDF files with an unlimited
+time dimension, chunked one frame per chunk like FELTOR writes them, in which
+each restart repeats the last time steps of the previous file.
+"""
+
+import os
+import json
+import numpy as np
+import netCDF4
+
+VARIABLES = ["electrons", "ions", "potential", "vorticity"]
+
+
+def write_run(
+    directory, files=2, frames=20, nx=128, ny=128, overlap=2, variables=VARIABLES
+):
+    """Write a synthetic restarted run of files files with frames time steps each.
+
+    Returns the glob pattern matching the files.
+    """
+    os.makedirs(directory, exist_ok=True)
+    inputfile = json.dumps(
+        {"n": 1, "Nx": nx, "Ny": ny, "lx": 200.0, "ly": 200.0, "dt": 0.1, "itstp": 5}
+    )
+    x = (np.arange(nx) + 0.5) * 200.0 / nx
+    y = (np.arange(ny) + 0.5) * 200.0 / ny
+    rng = np.random.default_rng(0)
+    start = 0
+    for i in range(files):
+        path = os.path.join(directory, f"output_{i}.nc")
+        with netCDF4.Dataset(path, "w") as nc:
+            nc.inputfile = inputfile
+            nc.createDimension("time", None)
+            nc.createDimension("y", ny)
+            nc.createDimension("x", nx)
+            nc.createVariable("time", "f8", ("time",))[:] = 0.5 * (
+                start + np.arange(frames)
+            )
+            nc.createVariable("y", "f8", ("y",))[:] = y
+            nc.createVariable("x", "f8", ("x",))[:] = x
+            for name in variables:
+                var = nc.createVariable(
+                    name, "f8", ("time", "y", "x"), chunksizes=(1, ny, nx)
+                )
+                for t in range(frames):
+                    blob = np.exp(
+                        -((x[None, :] - 50 - start - t) ** 2 + (y[:, None] - 100) ** 2)
+                        / 100
+                    )
+                    var[t] = blob + 0.01 * rng.standard_normal((ny, nx))
+        start += frames - overlap
+    return os.path.join(directory, "output_*.nc")
@@ -1,9 +1,17 @@
 import pytest
 from matplotlib import pyplot as plt
 import numpy as np
+from xfeltor import plotting
 import xarray as xr
 from animatplot.blocks import Pcolormesh, Line
 import os
+import logging
+from xfeltor.plotting import _find_limits, _FrameLoader, _coarsen, _select_frames
+from xfeltor.plotting import _Image, _mappable
+from xfeltor.export import _split_frames, _resolve_writer, save_animation
+from matplotlib.animation import FFMpegWriter
+from matplotlib.colors import LogNorm
+from PIL import Image
 
 
 @pytest.fixture
@@ -42,7 +50,7 @@ class TestAnimate:
 
         assert len(animation.blocks) == 1
         block = animation.blocks[0]
-        assert isinstance(block, Pcolormesh)
+        assert isinstance(block, _Image)
 
         assert block.ax.get_xlabel() == "x"
         assert block.ax.get_ylabel() == "y"
@@ -71,7 +79,346 @@ class TestAnimate:
         animation = ds.feltor.animate_list([ds["electrons"], ds["electrons"].isel(y=1)])
 
         assert len(animation.blocks) == 2
-        assert isinstance(animation.blocks[0], Pcolormesh)
+        assert isinstance(animation.blocks[0], _Image)
         assert isinstance(animation.blocks[1], Line)
 
         plt.close()
+
+    def test_animate2D_renderer(self, create_single_test_dataset):
+        da = create_single_test_dataset["electrons"]
+        block = da.feltor.animate2D(animate=False)
+        assert isinstance(block, _Image)
+        assert block.image.get_extent() == [-0.5, 4.5, -0.5, 4.5]
+        block._update(3)
+        np.testing.assert_array_equal(
+            block.image.get_array(), da.isel(time=3).transpose("y", "x").values
+        )
+        plt.close()
+
+        block = da.feltor.animate2D(animate=False, renderer="pcolormesh")
+        assert isinstance(block, Pcolormesh)
+        plt.close()
+
+        stretched = da.assign_coords(x=da.x**2)
+        block = stretched.feltor.animate2D(animate=False)
+        assert isinstance(block, Pcolormesh)
+        plt.close()
+
+        with pytest.raises(ValueError, match="uniformly spaced"):
+            stretched.feltor.animate2D(animate=False, renderer="image")
+        plt.close()
+
+
+class TestLimits:
+    """
+    Set of tests to check whether the color limits are found correctly in a single
+    pass over the data
+    """
+
+    def test_find_limits_chunked(self, create_single_test_dataset):
+        da = create_single_test_dataset["electrons"]
+        vmin, vmax = _find_limits(da.chunk({"time": 2, "x": 3}))
+
+        assert vmin == float(da.min())
+        assert vmax == float(da.max())
+
+    def test_find_limits_robust(self, create_single_test_dataset):
+        da = create_single_test_dataset["electrons"]
+        vmin, vmax = _find_limits(da, robust=True)
+
+        assert vmin == pytest.approx(np.percentile(da.values, 2.0))
+        assert vmax == pytest.approx(np.percentile(da.values, 98.0))
+
+        # Percentiles of all values, not an average of the chunks' percentiles
+        values = np.zeros((10, 5, 5))
+        values[0] = 100.0
+        frames = xr.DataArray(values, dims=("time", "y", "x")).chunk(time=1)
+        assert _find_limits(frames, robust=True) == (0.0, 100.0)
+
+        values = np.random.default_rng(1).normal(size=(20, 30, 30))
+        chunked = xr.DataArray(values, dims=("time", "y", "x")).chunk(time=3, x=7)
+        vmin, vmax = _find_limits(chunked, robust=True)
+        expected = np.percentile(values, [2.0, 98.0])
+        assert vmin == pytest.approx(expected[0], abs=0.05)
+        assert vmax == pytest.approx(expected[1], abs=0.05)
+
+    def test_animate2D_limits(self, create_single_test_dataset):
+        da = create_single_test_dataset["electrons"].chunk({"time": 1})
+        animation = da.feltor.animate2D()
+
+        norm = _mappable(animation.blocks[0]).norm
+        assert norm.vmin == float(da.min())
+        assert norm.vmax == float(da.max())
+
+        plt.close()
+
+    def test_animate_reads_once(self, create_single_test_dataset, monkeypatch):
+        da = create_single_test_dataset["electrons"].chunk({"time": 1})
+        limits_of = []
+
+        def find_limits(data, *args, **kwargs):
+            limits_of.append(type(data))
+            return _find_limits(data, *args, **kwargs)
+
+        monkeypatch.setattr(plotting, "_find_limits", find_limits)
+
+        # The limits of loaded data are found without reading the chunks again
+        da.feltor.animate2D(animate=False)
+        da.isel(y=1).feltor.animate1D(animate=False)
+        assert limits_of == [np.ndarray, np.ndarray]
+        plt.close("all")
+
+        da.feltor.animate2D(animate=False, lazy=True)
+        assert limits_of[-1] is xr.DataArray
+        plt.close()
+
+
+class TestLazy:
+    """
+    Set of tests to check whether lazy animations only load the frames they draw
+    """
+
+    def test_frame_loader(self, create_single_test_dataset):
+        da = create_single_test_dataset["electrons"].chunk({"time": 1})
+        frames = _FrameLoader(da.transpose("time", "y", "x"), "time", prefetch=2)
+
+        assert len(frames) == 5
+        np.testing.assert_array_equal(frames[3], da.isel(time=3).values.T)
+        assert frames._window.shape == (2, 5, 5)
+        np.testing.assert_array_equal(frames[-1], da.isel(time=4).values.T)
+
+    def test_animate2D_lazy(self, create_single_test_dataset):
+        da = create_single_test_dataset["electrons"].chunk({"time": 1})
+        animation = da.feltor.animate2D(lazy=True)
+
+        block = animation.blocks[0]
+        assert len(block) == 5
+        block._update(2)
+        np.testing.assert_array_equal(
+            _mappable(block).get_array(), da.isel(time=2).transpose("y", "x").values
+        )
+
+        plt.close()
+
+    def test_animate1D_lazy(self, create_single_test_dataset):
+        da = create_single_test_dataset["electrons"].isel(y=2).chunk({"time": 1})
+        animation = da.feltor.animate1D(lazy=True)
+
+        block = animation.blocks[0]
+        block._update(4)
+        np.testing.assert_array_equal(block.line.get_ydata(), da.isel(time=4).values)
+
+        plt.close()
+
+
+class TestParallelExport:
+    """
+    Set of tests to check whether animations rendered by a pool of processes are
+    saved with all frames in order
+    """
+
+    def test_split_frames(self):
+        ranges = _split_frames(10, 4)
+
+        assert [i for r in ranges for i in r] == list(range(10))
+        assert len(_split_frames(3, 8)) == 3
+
+    def test_animate2D_parallel(self, create_single_test_dataset, tmp_path):
+        ds = create_single_test_dataset
+        save_as = str(tmp_path / "testxy")
+        animation = ds["electrons"].feltor.animate2D(save_as=save_as, processes=2)
+        # The frames are only read by the workers
+        assert isinstance(animation.blocks[0].frames, _FrameLoader)
+        plt.close()
+
+        with Image.open(save_as + ".gif") as gif:
+            assert gif.n_frames == 5
+
+    def test_animate_list_parallel(self, create_single_test_dataset, tmp_path):
+        ds = create_single_test_dataset
+        save_as = str(tmp_path / "testlist")
+        animation = ds.feltor.animate_list(
+            [ds["electrons"], ds["electrons"].isel(y=1)], save_as=save_as, processes=2
+        )
+        for block in animation.blocks:
+            assert isinstance(block.frames, _FrameLoader)
+        plt.close()
+
+        with Image.open(save_as + ".gif") as gif:
+            assert gif.n_frames == 5
+
+    def test_animate2D_parallel_logscale(self, create_single_test_dataset, tmp_path):
+        da = create_single_test_dataset["electrons"] + 0.1
+        save_as = str(tmp_path / "testlog")
+        animation = da.feltor.animate2D(save_as=save_as, processes=2, logscale=True)
+        assert isinstance(_mappable(animation.blocks[0]).norm, LogNorm)
+        plt.close()
+
+        with Image.open(save_as + ".gif") as gif:
+            assert gif.n_frames == 5
+
+        save_as = str(tmp_path / "testlistlog")
+        ds = xr.Dataset({"electrons": da})
+        ds.feltor.animate_list(
+            [ds["electrons"], 2 * ds["electrons"]],
+            save_as=save_as,
+            processes=2,
+            logscale=True,
+        )
+        plt.close()
+
+        with Image.open(save_as + ".gif") as gif:
+            assert gif.n_frames == 5
+
+
+class TestWriter:
+    """
+    Set of tests to check whether the writer is selected correctly and falls back to
+    Pillow if ffmpeg is not installed
+    """
+
+    def test_resolve_writer(self, monkeypatch):
+        monkeypatch.setattr(FFMpegWriter, "isAvailable", classmethod(lambda cls: True))
+        assert _resolve_writer("auto") == "mp4"
+        assert _resolve_writer("webm") == "webm"
+        assert _resolve_writer("pillow") == "gif"
+
+        with pytest.raises(ValueError, match="writer"):
+            _resolve_writer("avi")
+
+    def test_fallback_to_pillow(
+        self, create_single_test_dataset, tmp_path, monkeypatch
+    ):
+        monkeypatch.setattr(FFMpegWriter, "isAvailable", classmethod(lambda cls: False))
+        ds = create_single_test_dataset
+        save_as = str(tmp_path / "testxy")
+
+        with pytest.warns(UserWarning, match="ffmpeg is not installed") as record:
+            ds["electrons"].feltor.animate2D(save_as=save_as, writer="mp4")
+        plt.close()
+        # The warning points at the call of animate2D
+        assert record[0].filename == __file__
+
+        assert os.path.exists(save_as + ".gif")
+
+    def test_save_report(self, create_single_test_dataset, tmp_path):
+        ds = create_single_test_dataset
+        anim = ds["electrons"].feltor.animate2D()
+        report = save_animation(anim, str(tmp_path / "testxy"), writer="pillow")
+        plt.close()
+
+        assert report["filename"].endswith("testxy.gif")
+        assert report["bytes"] == os.path.getsize(report["filename"])
+        assert report["seconds"] > 0
+        assert 0 < report["encode_seconds"] < report["seconds"]
+        assert report["render_seconds"] == pytest.approx(
+            report["seconds"] - report["encode_seconds"]
+        )
+
+    def test_export_report(self, create_single_test_dataset, tmp_path, caplog):
+        ds = create_single_test_dataset
+        save_as = str(tmp_path / "testlist")
+        with caplog.at_level(logging.INFO, logger="xfeltor.export"):
+            anim = ds.feltor.animate_list([ds["electrons"]], save_as=save_as)
+        plt.close()
+
+        assert anim.export_report["filename"] == save_as + ".gif"
+        assert anim.export_report["encode_seconds"] > 0
+        assert f"saved {save_as}.gif" in caplog.text
+
+        anim = ds["electrons"].feltor.animate2D(save_as=save_as, processes=2)
+        plt.close()
+        assert anim.export_report["bytes"] == os.path.getsize(save_as + ".gif")
+        assert anim.export_report["encode_seconds"] > 0
+
+
+class TestDownsample:
+    """
+    Set of tests to check whether large grids are coarsened to the resolution of the
+    axes before they are plotted
+    """
+
+    def test_coarsen_extrema(self):
+        da = xr.DataArray(
+            np.array([[0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 0.0, -1.0]]), dims=("y", "x")
+        )
+        coarse = _coarsen(da.chunk({"x": 4}), {"x": 4}, "extrema")
+
+        np.testing.assert_array_equal(coarse.values, [[1.0, -1.0]])
+
+    def test_animate2D_explicit_factor(self, create_single_test_dataset):
+        ds = create_single_test_dataset
+        animation = ds["electrons"].feltor.animate2D(downsample=2)
+
+        block = animation.blocks[0]
+        assert block.frames.shape == (5, 2, 2)
+        np.testing.assert_allclose(
+            block.frames[0, 0, 0],
+            ds["electrons"].isel(time=0, x=[0, 1], y=[0, 1]).mean(),
+        )
+
+        plt.close()
+
+    def test_animate2D_auto(self):
+        x = np.linspace(0, 1, 2000)
+        da = xr.DataArray(
+            np.random.rand(2, 2000, 2000),
+            dims=("time", "y", "x"),
+            coords={"time": [0.0, 1.0], "x": x, "y": x},
+            name="electrons",
+        )
+        animation = da.feltor.animate2D()
+        block = animation.blocks[0]
+        bbox = block.ax.get_window_extent()
+
+        assert block.frames.shape[2] < 2000
+        assert block.frames.shape[2] >= bbox.width
+        plt.close()
+
+        animation = da.feltor.animate2D(downsample=False)
+        assert animation.blocks[0].frames.shape == (2, 2000, 2000)
+        plt.close()
+
+
+class TestSelectFrames:
+    """
+    Set of tests to check whether the time window and stride options select the
+    right frames and compute the color limits over these frames only
+    """
+
+    def test_select_frames(self, create_single_test_dataset):
+        da = create_single_test_dataset["electrons"]
+
+        selected = _select_frames(da, "time", t_start=1.0, t_end=3.0)
+        assert list(selected.time.values) == [1.0, 2.0, 3.0]
+
+        selected = _select_frames(da, "time", time_stride=2)
+        assert list(selected.time.values) == [0.0, 2.0, 4.0]
+
+        selected = _select_frames(da, "time", max_frames=2)
+        assert list(selected.time.values) == [0.0, 3.0]
+
+        for options in [{"time_stride": 0}, {"time_stride": -1}, {"max_frames": 0}]:
+            with pytest.raises(ValueError, match="at least 1"):
+                _select_frames(da, "time", **options)
+
+    def test_animate2D_window(self, create_single_test_dataset):
+        da = create_single_test_dataset["electrons"]
+        animation = da.feltor.animate2D(t_start=1.0, t_end=2.0)
+
+        assert len(animation.timeline) == 2
+        norm = _mappable(animation.blocks[0]).norm
+        assert norm.vmax == float(da.sel(time=[1.0, 2.0]).max())
+
+        plt.close()
+
+    def test_animate_list_stride(self, create_single_test_dataset):
+        ds = create_single_test_dataset
+        animation = ds.feltor.animate_list(
+            [ds["electrons"], ds["electrons"].isel(y=1)], time_stride=2
+        )
+
+        assert len(animation.timeline) == 3
+        assert all(len(block) == 3 for block in animation.blocks)
+
+        plt.close()
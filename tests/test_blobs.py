@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+import xarray as xr
+import xfeltor  # noqa: F401, registers the accessors
+
+pytest.importorskip("scipy")
+
+
+def create_blob_dataarray():
+    """create two Gaussian blobs moving in x with velocities 1 and -0.5"""
+    time = np.arange(10.0)
+    x = np.arange(0.0, 40.0, 0.5)
+    y = np.arange(0.0, 20.0, 0.5)
+    t, yy, xx = np.meshgrid(time, y, x, indexing="ij")
+    first = np.exp(-((xx - 5 - t) ** 2 + (yy - 5) ** 2))
+    second = 2 * np.exp(-((xx - 30 + 0.5 * t) ** 2 + (yy - 15) ** 2))
+    return xr.DataArray(
+        first + second,
+        dims=["time", "y", "x"],
+        coords=dict(time=time, y=y, x=x),
+        name="electrons",
+    ).chunk(time=3)
+
+
+def test_track_blobs():
+    """test whether blobs are detected and tracked"""
+    da = create_blob_dataarray()
+    blobs = da.feltor.track_blobs(threshold=0.1, max_distance=3)
+
+    assert blobs.sizes["blob"] == 20
+    assert len(np.unique(blobs["track"])) == 2
+    for track in blobs.groupby("track").groups.values():
+        blob = blobs.isel(blob=track)
+        assert blob.sizes["blob"] == 10
+        np.testing.assert_array_equal(blob["time"], da.time)
+        expected = 1.0 if blob["amplitude"][0] < 1.5 else -0.5
+        np.testing.assert_allclose(blob["vx"], expected, atol=1e-6)
+        np.testing.assert_allclose(blob["vy"], 0, atol=1e-6)
+
+
+def test_track_blobs_gap():
+    """test whether blobs missing in a frame start a new track"""
+    da = create_blob_dataarray().compute()
+    da[4] = 0
+    blobs = da.feltor.track_blobs(threshold=0.1, min_size=2)
+    assert len(np.unique(blobs["track"])) == 4
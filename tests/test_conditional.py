@@ -0,0 +1,54 @@
+import numpy as np
+import xarray as xr
+from xfeltor.conditional import find_events
+
+
+def test_find_events():
+    """test whether one event per excursion above the threshold is found"""
+    signal = np.array([0, 2, 3, 1, 0, 0, 5, 0, 4, 0, 0, 0, 0, 0, 3, 0])
+    np.testing.assert_array_equal(find_events(signal, 1.5), [2, 6, 8, 14])
+    np.testing.assert_array_equal(
+        find_events(signal, 1.5, 1, overlap=True), [2, 6, 8, 14]
+    )
+    # 8 is too close to the larger 6, 14 too close to the end
+    np.testing.assert_array_equal(find_events(signal, 1.5, 2), [2, 6])
+
+
+def test_conditional_average():
+    """test whether the windows around the events are averaged"""
+    time = np.arange(100.0) * 0.5
+    rng = np.random.default_rng(2)
+    signal = rng.normal(scale=0.1, size=100)
+    events = [20, 50, 80]
+    signal[events] = [3.0, 4.0, 5.0]
+    field = np.arange(100.0)[:, None] * np.ones((1, 4))
+    ds = xr.Dataset(
+        data_vars=dict(probe=("time", signal), electrons=(["time", "x"], field)),
+        coords=dict(time=time, x=np.arange(4.0)),
+    ).chunk(time=16)
+
+    result = ds.feltor.conditional_average("probe", threshold=1.0, window=5)
+
+    assert result.attrs["events"] == 3
+    np.testing.assert_array_equal(result["event_time"], time[events])
+    np.testing.assert_allclose(result["lag"], np.arange(-5, 6) * 0.5)
+    assert result["electrons"].dims == ("lag", "x")
+    np.testing.assert_allclose(result["electrons"][:, 0], 50 + np.arange(-5, 6))
+    assert result["reference"][5] == 4.0
+
+
+def test_conditional_average_dataarray_threshold():
+    """test whether a threshold computed from the reference can be passed"""
+    signal = np.zeros(50)
+    signal[[10, 30]] = [4.0, 6.0]
+    ds = xr.Dataset(
+        data_vars=dict(probe=("time", signal)), coords=dict(time=np.arange(50.0))
+    ).chunk(time=10)
+    probe = ds["probe"]
+    threshold = probe.mean() + 2.5 * probe.std()
+
+    result = ds.feltor.conditional_average(probe, threshold, window=3)
+
+    assert result.attrs["events"] == 2
+    assert isinstance(result.attrs["threshold"], float)
+    np.testing.assert_array_equal(result["event_time"], [10.0, 30.0])
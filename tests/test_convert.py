@@ -0,0 +1,44 @@
+import pytest
+import numpy as np
+import xarray as xr
+from xfeltor import open_feltordataset, convert_to_zarr
+from xfeltor.cli import convert
+from test_load import create_two_test_dataset
+
+zarr = pytest.importorskip("zarr")
+
+
+def test_convert_to_zarr(tmp_path):
+    """test whether a restarted run is converted and opened again transparently"""
+    create_two_test_dataset()
+    store = str(tmp_path / "run.zarr")
+    timeseries_store = str(tmp_path / "run_timeseries.zarr")
+    convert_to_zarr(
+        "test_multiple_dataset*.nc",
+        store,
+        timeseries_store=timeseries_store,
+        timeseries_chunks={"time": 8, "x": 2, "y": 2},
+    )
+
+    expected = open_feltordataset("test_multiple_dataset*.nc")
+    ds = open_feltordataset(store)
+    xr.testing.assert_equal(ds, expected)
+    assert ds["electrons"].chunks == ((5,), (5,), (1,) * 8)
+    assert ds.feltor.params.Nx == 5
+
+    timeseries = open_feltordataset(timeseries_store)
+    np.testing.assert_array_equal(
+        timeseries["electrons"].values, expected["electrons"].values
+    )
+    assert timeseries["electrons"].chunks == ((2, 2, 1), (2, 2, 1), (8,))
+
+
+def test_convert_cli(tmp_path):
+    """test whether the xfeltor-convert entry point writes the store"""
+    create_two_test_dataset()
+    store = str(tmp_path / "run.zarr")
+    convert(["test_multiple_dataset*.nc", store, "--chunks", "time=2", "--zstd", "3"])
+
+    ds = open_feltordataset(store)
+    assert list(ds.time.values) == [0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0]
+    assert ds["electrons"].chunks[2] == (2, 2, 2, 2)
@@ -0,0 +1,89 @@
+import json
+import numpy as np
+import pytest
+import xarray as xr
+from xfeltor.derived import register_derived, _DERIVED
+
+
+def create_potential_dataset(bc_y="PER"):
+    """create a dataset with a potential periodic in y"""
+    x = np.arange(32) * 0.1
+    y = np.arange(64) * 2 * np.pi / 64
+    time = np.arange(3.0)
+    t, yy, xx = np.meshgrid(time, y, x, indexing="ij")
+    return xr.Dataset(
+        data_vars=dict(potential=(["time", "y", "x"], xx**2 * np.sin(yy))),
+        coords=dict(time=time, y=y, x=x),
+        attrs=dict(inputfile=json.dumps({"n": 1, "bc_x": "DIR", "bc_y": bc_y})),
+    ).chunk(time=1)
+
+
+def test_derived_fields():
+    """test the E x B velocity and its memoization"""
+    ds = create_potential_dataset()
+    v = ds.feltor.derived["vExB_x"]
+
+    assert v.chunks is not None
+    assert ds.feltor.derived["vExB_x"] is v
+    expected = -(ds.x**2) * np.cos(ds.y)
+    np.testing.assert_allclose(v, expected.broadcast_like(v), atol=0.02)
+    np.testing.assert_allclose(
+        ds.feltor.derived["dx_potential"].isel(x=slice(1, -1)),
+        (2 * ds.x * np.sin(ds.y)).broadcast_like(v).isel(x=slice(1, -1)),
+        atol=1e-10,
+    )
+    assert "vorticity_ExB" in ds.feltor.derived
+    with pytest.raises(KeyError):
+        ds.feltor.derived["dz_potential"]
+
+
+def test_derived_requires():
+    """test whether fields are only available if their inputs are"""
+    ds = create_potential_dataset().rename(potential="electrons")
+    derived = ds.feltor.derived
+
+    assert "vExB_x" not in derived
+    assert "vorticity_ExB" not in derived
+    assert "dx_electrons" in derived
+    assert list(derived) == ["dx_electrons", "dy_electrons"]
+    with pytest.raises(KeyError, match="vExB_x"):
+        derived["vExB_x"]
+
+
+def test_derived_boundary():
+    """test whether the boundary condition is taken from the input parameters"""
+    periodic = create_potential_dataset("PER").feltor.derived["vExB_x"]
+    edge = create_potential_dataset("DIR").feltor.derived["vExB_x"]
+    np.testing.assert_allclose(periodic.isel(y=slice(1, -1)), edge.isel(y=slice(1, -1)))
+    assert not np.allclose(periodic.isel(y=0), edge.isel(y=0))
+
+
+def test_derived_save(tmp_path):
+    """test whether saved fields are reused"""
+    ds = create_potential_dataset()
+    ds.feltor.derived["vExB_x"]
+    ds.feltor.derived.save(tmp_path / "derived.nc")
+
+    other = create_potential_dataset()
+    other.feltor.derived.load(tmp_path / "derived.nc")
+    xr.testing.assert_allclose(
+        other.feltor.derived["vExB_x"], ds.feltor.derived["vExB_x"]
+    )
+    assert other.feltor.derived["vExB_x"].encoding["source"].endswith("derived.nc")
+
+
+def test_register_derived():
+    """test whether new fields can be registered"""
+
+    @register_derived("potential_squared")
+    def potential_squared(fields):
+        return fields.ds["potential"] ** 2
+
+    ds = create_potential_dataset()
+    try:
+        xr.testing.assert_allclose(
+            ds.feltor.derived["potential_squared"].compute(),
+            (ds["potential"] ** 2).rename("potential_squared").compute(),
+        )
+    finally:
+        del _DERIVED["potential_squared"]
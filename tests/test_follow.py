@@ -0,0 +1,53 @@
+import numpy as np
+import netCDF4
+from xfeltor import FeltorFollower
+
+
+def write_output(path, times, mode="w"):
+    """write or append time steps to a FELTOR-like output file with an unlimited
+    time dimension"""
+    with netCDF4.Dataset(path, mode) as nc:
+        if mode == "w":
+            nc.inputfile = '{"Nx" : 4, "maxout" : 10}'
+            nc.createDimension("time", None)
+            nc.createDimension("x", 4)
+            nc.createVariable("time", "f8", ("time",))
+            nc.createVariable("x", "f8", ("x",))[:] = np.arange(4.0)
+            nc.createVariable("electrons", "f8", ("time", "x"))
+        start = len(nc.dimensions["time"])
+        for i, t in enumerate(times):
+            nc["time"][start + i] = t
+            nc["electrons"][start + i, :] = t + np.arange(4.0)
+
+
+def test_follow_appended_steps(tmp_path):
+    """test whether newly appended time steps are added to the dataset"""
+    path = str(tmp_path / "output.nc")
+    write_output(path, [0.0, 1.0, 2.0])
+    follower = FeltorFollower(path)
+    assert list(follower.ds.time.values) == [0.0, 1.0, 2.0]
+    assert follower.ds.feltor.params.Nx == 4
+    assert follower.update() is None
+
+    write_output(path, [3.0, 4.0], mode="a")
+    new = follower.update()
+
+    assert list(new.time.values) == [3.0, 4.0]
+    assert list(follower.ds.time.values) == [0.0, 1.0, 2.0, 3.0, 4.0]
+    np.testing.assert_array_equal(
+        follower.ds["electrons"].values[:, 0], [0.0, 1.0, 2.0, 3.0, 4.0]
+    )
+
+
+def test_follow_restart(tmp_path):
+    """test whether a new restart file replaces the overlapping time steps"""
+    write_output(str(tmp_path / "output_1.nc"), [0.0, 1.0, 2.0])
+    follower = FeltorFollower(str(tmp_path / "output_*.nc"))
+
+    write_output(str(tmp_path / "output_2.nc"), [2.0, 3.0])
+    received = []
+    follower.follow(lambda new, ds: received.append(new), interval=0, timeout=0.1)
+
+    assert len(received) == 1
+    assert list(received[0].time.values) == [2.0, 3.0]
+    assert list(follower.ds.time.values) == [0.0, 1.0, 2.0, 3.0]
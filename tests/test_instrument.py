@@ -0,0 +1,68 @@
+import json
+import numpy as np
+import xarray as xr
+import xfeltor
+from xfeltor.instrument import stage
+
+
+def write_output(path):
+    """write a small FELTOR-like output file"""
+    ds = xr.Dataset(
+        {"electrons": (["time", "y", "x"], np.random.rand(4, 5, 6))},
+        coords={"time": np.arange(4.0), "y": np.arange(5.0), "x": np.arange(6.0)},
+        attrs={"inputfile": '{"Nx" : 6, "Ny" : 5, "maxout" : 4}'},
+    )
+    ds.to_netcdf(path)
+
+
+def test_profile_stages(tmp_path):
+    """test whether loading, plotting and saving record their stages"""
+    path = str(tmp_path / "output.nc")
+    write_output(path)
+    finished = []
+    with xfeltor.profile(callback=finished.append) as report:
+        ds = xfeltor.open_feltordataset(path, chunks={"time": 2})
+        ds["electrons"].feltor.animate2D(save_as=str(tmp_path / "electrons"))
+
+    names = [entry.name for entry in report.stages]
+    for name in [
+        "load.open",
+        "load.combine",
+        "open_feltordataset",
+        "plotting.limits",
+        "plotting.read",
+        "plotting.build",
+        "plotting.animate_pcolormesh",
+        "export.encode",
+        "export.save",
+        "feltor.animate2D",
+    ]:
+        assert name in names
+    # Stages are reported when they finish, so enclosing stages come last
+    assert names[-1] == "feltor.animate2D"
+    assert report.stages[-1].depth == 0
+    assert report.stages[names.index("export.save")].depth == 2
+
+    assert [entry["name"] for entry in finished] == names
+    summary = report.summary()
+    assert summary["open_feltordataset"]["calls"] == 1
+    assert summary["open_feltordataset"]["seconds"] > 0
+    assert "feltor.animate2D" in str(report)
+    json.dumps(report.to_dict())
+
+    with stage("ignored"):
+        pass
+    assert len(report.stages) == len(names)
+
+
+def test_profile_memory():
+    """test whether the peak memory of nested stages is recorded"""
+    with xfeltor.profile(memory=True) as report:
+        with stage("outer"):
+            with stage("inner"):
+                values = np.ones(1_000_000)
+            del values
+    inner, outer = report.stages
+    assert inner.name == "inner"
+    assert inner.peak_bytes >= 8_000_000
+    assert outer.peak_bytes >= inner.peak_bytes
@@ -0,0 +1,63 @@
+import json
+import numpy as np
+import pytest
+import xarray as xr
+from xfeltor.interpolate import dg_cells, _gauss_legendre_nodes
+
+
+def dg_coordinate(n, cells, h, x0=0.0):
+    """Return the Gauss-Legendre nodes of a dG grid"""
+    xi = _gauss_legendre_nodes(n)
+    return (x0 + h * (np.arange(cells)[:, None] + (1 + xi) / 2)).ravel()
+
+
+def polynomial(t, y, x):
+    return t + x**2 - 3 * x * y + y**2
+
+
+def create_dg_dataset(n=3):
+    """create a dataset of a polynomial of degree n-1 on a dG grid"""
+    time = np.arange(4.0)
+    x = dg_coordinate(n, 4, 2.0)
+    y = dg_coordinate(n, 5, 2.0, x0=1.0)
+    t, yy, xx = np.meshgrid(time, y, x, indexing="ij")
+    return xr.Dataset(
+        data_vars=dict(electrons=(["time", "y", "x"], polynomial(t, yy, xx))),
+        coords=dict(time=time, y=y, x=x),
+        attrs=dict(inputfile=json.dumps({"n": n, "Nx": 4, "Ny": 5})),
+    ).chunk(time=2)
+
+
+def test_dg_cells():
+    """test whether the cells are found from the coordinate"""
+    assert np.allclose(dg_cells(dg_coordinate(3, 4, 2.0, x0=1.0), 3), (1.0, 2.0))
+    assert np.allclose(dg_cells(dg_coordinate(3, 1, 2.0, x0=1.0), 3), (1.0, 2.0))
+    with pytest.raises(ValueError, match="Gauss-Legendre"):
+        dg_cells(np.linspace(0, 1, 12), 3)
+
+
+def test_interpolate_grid():
+    """test whether the interpolation to a new grid is exact for polynomials"""
+    ds = create_dg_dataset()
+    x = np.linspace(0, 8, 7)
+    y = np.linspace(1, 11, 5)
+    result = ds.feltor.interpolate(x=x, y=y)
+
+    assert result["electrons"].dims == ("time", "y", "x")
+    assert result["electrons"].chunks[0] == (2, 2)
+    t, yy, xx = np.meshgrid(ds.time, y, x, indexing="ij")
+    np.testing.assert_allclose(result["electrons"].values, polynomial(t, yy, xx))
+
+
+def test_interpolate_points():
+    """test whether individual points are interpolated"""
+    ds = create_dg_dataset()
+    x = xr.DataArray([1.0, 2.5, 7.9, 9.0], dims="probe")
+    y = xr.DataArray([3.0, 4.0, 10.5, 4.0], dims="probe")
+    result = ds.feltor.interpolate(x=x, y=y)
+
+    assert result["electrons"].dims == ("time", "probe")
+    expected = polynomial(ds.time.values[:, None], y.values, x.values)
+    np.testing.assert_allclose(result["electrons"].values[:, :3], expected[:, :3])
+    assert np.isnan(result["electrons"].values[:, 3]).all()
+    np.testing.assert_array_equal(result["x"], x)
@@ -1,6 +1,12 @@
+import pytest
 import xarray as xr
 import numpy as np
 from xfeltor import open_feltordataset
+from xfeltor.load import _restart_slices, _expand_paths
+from xfeltor import metadata
+from xfeltor.metadata import scan_file
+from xfeltor.chunks import auto_chunks
+import os
 
 
 def create_single_test_dataset() -> None:
@@ -82,9 +88,162 @@ def test_two_load():
 
 
 def test_attributes():
-    """test wheteher input file parameters are stored corretly as attributes"""
+    """test wheteher input file parameters are available as ds.feltor.params"""
     create_single_test_dataset()
     ds = open_feltordataset("test_single_dataset.nc")
-    assert ds.attrs["Nx"] == 5
-    assert ds.attrs["Nx_out"] == 5
-    assert ds.attrs["maxout"] == 5
+    assert ds.feltor.params.Nx == 5
+    assert ds.feltor.params["Nx_out"] == 5
+    assert ds.feltor.params.maxout == 5
+    assert "Nx" not in ds.attrs
+
+
+def test_restart_last_write_wins():
+    """test whether overlapping time steps are taken from the later restart file"""
+    create_two_test_dataset()
+    ds = open_feltordataset("test_multiple_dataset*.nc")
+    second = xr.open_dataset("test_multiple_dataset_2.nc")
+
+    np.testing.assert_array_equal(
+        ds["electrons"].sel(time=[3.0, 4.0]).values,
+        second["electrons"].sel(time=[3.0, 4.0]).values,
+    )
+    assert ds["electrons"].chunks[2] == (3, 5)
+    second.close()
+
+
+def test_restart_slices():
+    """test whether each file is cut before the start of any later file"""
+    times = [np.arange(0, 5), np.arange(3, 8), np.arange(2, 4), np.arange(10, 12)]
+    slices = _restart_slices(times)
+    assert [s.stop for s in slices] == [2, 0, 2, 2]
+
+
+def test_parallel_load():
+    """test whether the dataset built from the metadata of a parallel scan equals
+    the dataset opened file by file"""
+    create_two_test_dataset()
+    expected = open_feltordataset("test_multiple_dataset*.nc")
+    ds = open_feltordataset("test_multiple_dataset*.nc", parallel=2)
+
+    xr.testing.assert_identical(ds, expected)
+    assert ds["electrons"].chunks == expected["electrons"].chunks
+
+
+def test_parallel_load_chunks():
+    """test whether a parallel scan accepts the same chunks as xarray"""
+    create_two_test_dataset()
+    for chunks in [2, "auto", {"x": "auto", "y": 2}]:
+        expected = open_feltordataset("test_multiple_dataset*.nc", chunks=chunks)
+        ds = open_feltordataset("test_multiple_dataset*.nc", chunks, parallel=2)
+        assert ds["electrons"].chunks == expected["electrons"].chunks
+
+    with pytest.raises(ValueError, match="chunks"):
+        open_feltordataset("test_multiple_dataset*.nc", "rows", parallel=2)
+
+
+def test_scan_file():
+    """test whether the metadata of a file is read correctly"""
+    create_single_test_dataset()
+    meta = scan_file("test_single_dataset.nc")
+
+    assert meta.dims == {"x": 5, "y": 5, "time": 5}
+    assert meta.variables["electrons"]["dims"] == ["x", "y", "time"]
+    assert list(meta.times()) == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert "inputfile" in meta.attrs
+
+
+def test_natural_sort(tmp_path):
+    """test whether restart files are sorted naturally"""
+    for i in [10, 2, 1]:
+        (tmp_path / f"run_{i}.nc").touch()
+    paths = _expand_paths(str(tmp_path / "run_*.nc"))
+    assert [os.path.basename(path) for path in paths] == [
+        "run_1.nc",
+        "run_2.nc",
+        "run_10.nc",
+    ]
+
+
+def test_metadata_cache(tmp_path, monkeypatch):
+    """test whether unchanged files are not scanned again if a cache is used"""
+    create_two_test_dataset()
+    cache = str(tmp_path / "cache.json")
+    expected = open_feltordataset("test_multiple_dataset*.nc", cache=cache)
+    assert os.path.exists(cache)
+
+    scanned = []
+    monkeypatch.setattr(
+        metadata, "scan_file", lambda path: scanned.append(path) or scan_file(path)
+    )
+    ds = open_feltordataset("test_multiple_dataset*.nc", cache=cache)
+    assert scanned == []
+    xr.testing.assert_identical(ds, expected)
+
+    os.utime("test_multiple_dataset_2.nc", ns=(0, 0))
+    open_feltordataset("test_multiple_dataset*.nc", cache=cache)
+    assert scanned == ["test_multiple_dataset_2.nc"]
+
+
+def test_metadata_cache_unwritable(tmp_path):
+    """test whether a cache that cannot be written is reported at the caller"""
+    create_single_test_dataset()
+    cache = str(tmp_path / "missing" / "cache.json")
+    with pytest.warns(UserWarning, match="metadata cache") as record:
+        open_feltordataset("test_single_dataset.nc", cache=cache)
+    assert record[0].filename == __file__
+
+
+def test_auto_chunks():
+    """test whether the chunks of an access pattern fit into the budget and consist
+    of whole on-disk chunks"""
+    sizes = {"time": 100, "y": 64, "x": 32}
+    variables = [(sizes, 8, {"time": 1, "y": 8, "x": 32})]
+    frame = 8 * 64 * 32
+
+    chunks = auto_chunks(variables, "frames", target_bytes=10 * frame)
+    assert chunks == {"time": 10, "y": 64, "x": 32}
+    chunks = auto_chunks(variables, "frames", target_bytes=frame // 4)
+    assert chunks == {"time": 1, "y": 16, "x": 32}
+    chunks = auto_chunks(variables, "timeseries", target_bytes=8 * 100 * 64)
+    assert chunks == {"time": -1, "y": 8, "x": 32}
+
+
+def test_auto_chunks_load():
+    """test whether open_feltordataset chooses chunks for an access pattern"""
+    create_two_test_dataset()
+    for parallel in [False, 2]:
+        ds = open_feltordataset(
+            "test_multiple_dataset*.nc", chunks="timeseries", parallel=parallel
+        )
+        assert ds["electrons"].chunks == ((5,), (5,), (3, 5))
+        ds = open_feltordataset(
+            "test_multiple_dataset*.nc", chunks="frames", parallel=parallel
+        )
+        assert ds["electrons"].chunks[:2] == ((5,), (5,))
+
+
+def test_subset_load(tmp_path):
+    """test whether variables and spatial regions are selected before combining"""
+    for i, start in enumerate([0, 3]):
+        time = np.linspace(start, start + 4, 5)
+        ds = xr.Dataset(
+            data_vars=dict(
+                electrons=(["time", "y", "x"], np.random.rand(5, 4, 3)),
+                ions=(["time", "y", "x"], np.random.rand(5, 4, 3)),
+            ),
+            coords=dict(time=time, y=np.arange(4.0), x=np.arange(3.0)),
+        )
+        ds.to_netcdf(tmp_path / f"run_{i}.nc")
+
+    path = str(tmp_path / "run_*.nc")
+    expected = open_feltordataset(path)[["ions"]].isel(y=slice(1, 3)).sel(x=2.0)
+    for parallel in [False, 2]:
+        ds = open_feltordataset(
+            path,
+            variables=["ions"],
+            isel={"y": slice(1, 3)},
+            sel={"x": 2.0},
+            parallel=parallel,
+        )
+        assert list(ds.data_vars) == ["ions"]
+        xr.testing.assert_identical(ds, expected)
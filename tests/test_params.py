@@ -0,0 +1,53 @@
+import json
+import pytest
+from xfeltor.params import parameters, FeltorParameters
+
+INPUTFILE = json.dumps(
+    {
+        "grid": {"n": 3, "Nx": 20, "Ny": 10},
+        "timestepper": {"dt": 0.5, "itstp": 4},
+        "box": {"lx": 60.0, "ly": 30.0},
+        "output": {"compression": [2, 2]},
+    }
+)
+
+
+def test_parse_once():
+    """test whether each inputfile string is parsed only once"""
+    params = parameters(INPUTFILE)
+    assert parameters(INPUTFILE) is params
+    assert isinstance(params.grid, FeltorParameters)
+    assert params.grid is params["grid"]
+
+
+def test_nested_access():
+    """test dotted access to nested parameters"""
+    params = parameters(INPUTFILE)
+    assert params.grid.Nx == 20
+    assert params.output.compression == (2, 2)
+    assert params.find("itstp") == 4
+    assert params.find("missing", 1) == 1
+    with pytest.raises(AttributeError):
+        _ = params.missing
+
+
+def test_read_only():
+    """test whether parameters cannot be changed"""
+    params = parameters(INPUTFILE)
+    with pytest.raises(AttributeError):
+        params.grid = None
+    with pytest.raises(TypeError):
+        params["grid"] = None
+    params.to_dict()["grid"]["Nx"] = 1
+    assert params.grid.Nx == 20
+
+
+def test_derived_quantities():
+    """test the derived grid quantities"""
+    params = parameters(INPUTFILE)
+    assert params.nx == 60
+    assert params.ny == 30
+    assert params.dx == 1.0
+    assert params.dy == 1.0
+    assert params.output_dt == 2.0
+    assert "nx" in params.__dict__
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from test_interpolate import create_dg_dataset, polynomial
+
+
+def test_probes_nearest():
+    """test whether the probes equal the selection of each single probe"""
+    ds = create_dg_dataset()
+    ds["ions"] = 2 * ds["electrons"]
+    ds["energy"] = ds["time"] ** 2
+    x = ds.x.values[[0, 4, 7]]
+    y = ds.y.values[[1, 1, 9]]
+    result = ds.feltor.probes({"x": x, "y": y})
+
+    assert set(result.data_vars) == {"electrons", "ions"}
+    assert result["electrons"].dims == ("probe", "time")
+    assert not result["electrons"].chunks
+    for i in range(3):
+        np.testing.assert_array_equal(
+            result["ions"].isel(probe=i), ds["ions"].sel(x=x[i], y=y[i])
+        )
+
+
+def test_probes_dg(tmp_path):
+    """test whether interpolated probes are written to disk"""
+    ds = create_dg_dataset()
+    x = np.array([1.0, 2.5])
+    y = np.array([3.0, 4.0])
+    path = tmp_path / "probes.nc"
+    result = ds.feltor.probes(
+        {"x": x, "y": y}, ["electrons"], method="dg", save_as=path
+    )
+
+    assert path.exists()
+    np.testing.assert_allclose(
+        result["electrons"].values, polynomial(ds.time.values, y[:, None], x[:, None])
+    )
+    np.testing.assert_array_equal(result["x"], x)
+    result.close()
+    with pytest.raises(ValueError, match="same length"):
+        ds.feltor.probes({"x": x, "y": y[:1]})
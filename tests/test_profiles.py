@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+import xarray as xr
+from xfeltor.derivatives import gradient
+from test_interpolate import create_dg_dataset
+
+
+def create_turbulence_dataset():
+    """create a dataset with a potential periodic in y"""
+    time = np.arange(6.0)
+    x = np.arange(4.0)
+    y = np.arange(16.0) * 2 * np.pi / 16
+    t, xx, yy = np.meshgrid(time, x, y, indexing="ij")
+    rng = np.random.default_rng(1)
+    return xr.Dataset(
+        data_vars=dict(
+            electrons=(["time", "x", "y"], 1 + xx + rng.normal(size=t.shape)),
+            potential=(["time", "x", "y"], xx * np.sin(yy + t)),
+        ),
+        coords=dict(time=time, x=x, y=y),
+    ).chunk(time=2)
+
+
+def test_gradient_dg():
+    """test whether the dG derivative is exact for polynomials"""
+    ds = create_dg_dataset()
+    result = gradient(ds["electrons"], "x", n=3)
+    expected = 2 * ds.x - 3 * ds.y
+    xr.testing.assert_allclose(result, expected.broadcast_like(result))
+
+
+def test_gradient_periodic():
+    """test whether periodic differences wrap around"""
+    y = np.arange(64) * 2 * np.pi / 64
+    da = xr.DataArray(np.sin(y), dims="y", coords=dict(y=y))
+    np.testing.assert_allclose(gradient(da, "y"), np.cos(y), atol=1e-2)
+    with pytest.raises(ValueError, match="boundary"):
+        gradient(da, "y", boundary="dirichlet")
+
+
+def test_radial_profiles():
+    """test the mean profiles and fluctuation levels"""
+    ds = create_turbulence_dataset()
+    result = ds.feltor.radial_profiles(["electrons"])
+
+    assert result["electrons"].dims == ("x",)
+    xr.testing.assert_allclose(
+        result["electrons"], ds["electrons"].mean(["time", "y"]).compute()
+    )
+    xr.testing.assert_allclose(
+        result["electrons_std"], ds["electrons"].std(["time", "y"]).compute()
+    )
+
+
+def test_radial_profiles_mixed_dims():
+    """test whether each variable is averaged over its own dimensions"""
+    ds = create_turbulence_dataset()
+    ds["temperature"] = ds["electrons"].mean("y")
+    result = ds.feltor.radial_profiles(["electrons", "temperature"])
+
+    assert result["temperature"].dims == ("x",)
+    xr.testing.assert_allclose(
+        result["temperature"], ds["electrons"].mean(["time", "y"]).compute()
+    )
+
+    ds["electrons"] = ds["temperature"]
+    result = ds.feltor.radial_flux()
+    assert result["flux"].dims == ("x",)
+    xr.testing.assert_allclose(
+        result["density"], ds["electrons"].mean("time").compute()
+    )
+
+
+def test_radial_flux():
+    """test the flux against the flux computed from full arrays"""
+    ds = create_turbulence_dataset()
+    result = ds.feltor.radial_flux()
+
+    velocity = -ds["potential"].differentiate("y").values
+    # Centered differences at the periodic boundary
+    phi = ds["potential"].values
+    dy = float(ds.y[1] - ds.y[0])
+    velocity[..., 0] = -(phi[..., 1] - phi[..., -1]) / (2 * dy)
+    velocity[..., -1] = -(phi[..., 0] - phi[..., -2]) / (2 * dy)
+    n_e = ds["electrons"].values
+    flux = (n_e * velocity).mean(axis=(0, 2))
+    np.testing.assert_allclose(result["flux"], flux)
+    np.testing.assert_allclose(
+        result["fluctuation_flux"],
+        flux - n_e.mean(axis=(0, 2)) * velocity.mean(axis=(0, 2)),
+    )
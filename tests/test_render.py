@@ -0,0 +1,52 @@
+import os
+import numpy as np
+import pytest
+import xarray as xr
+from xfeltor import render_runs
+from xfeltor.cli import render
+
+
+def write_run(directory):
+    """write a small FELTOR-like run of two restart files into directory"""
+    os.makedirs(directory)
+    for i, time in enumerate([np.arange(3.0), np.arange(2.0, 5.0)]):
+        xr.Dataset(
+            {
+                "electrons": (["time", "y", "x"], np.random.rand(3, 4, 5)),
+                "potential": (["time", "y", "x"], np.random.rand(3, 4, 5)),
+            },
+            coords={"time": time, "y": np.arange(4.0), "x": np.arange(5.0)},
+            attrs={"inputfile": '{"Nx" : 5, "Ny" : 4, "maxout" : 3}'},
+        ).to_netcdf(os.path.join(directory, f"output_{i}.nc"))
+
+
+def test_render_runs(tmp_path):
+    """test whether every run is rendered once and only updated runs again"""
+    for run in ["run_a", "run_b"]:
+        write_run(tmp_path / run)
+    runs = [str(tmp_path / "run_*")]
+    variables = ["electrons", "potential:y=1"]
+
+    jobs = render_runs(runs, variables, processes=2)
+    assert [job["status"] for job in jobs] == ["rendered", "rendered"]
+    assert jobs[0]["filename"] == str(tmp_path / "run_a" / "animation.gif")
+    assert jobs[0]["frames"] == 5
+    assert 0 < jobs[0]["open_seconds"] < jobs[0]["seconds"]
+    assert os.path.exists(tmp_path / "run_b" / "animation.gif")
+
+    # Only the run with a newer output file is rendered again
+    later = os.path.getmtime(jobs[0]["filename"]) + 10
+    os.utime(tmp_path / "run_b" / "output_1.nc", (later, later))
+    jobs = render_runs(runs, variables, processes=2)
+    assert [job["status"] for job in jobs] == ["skipped", "rendered"]
+
+
+def test_render_cli(tmp_path):
+    """test whether the xfeltor-render entry point reports failed runs"""
+    write_run(tmp_path / "run")
+    output = str(tmp_path / "movies" / "{run}")
+    render([str(tmp_path / "run"), "-v", "electrons", "-o", output, "-j", "1"])
+    assert os.path.exists(tmp_path / "movies" / "run.gif")
+
+    with pytest.raises(SystemExit):
+        render([str(tmp_path / "run"), "-v", "ions", "--force", "-j", "1"])
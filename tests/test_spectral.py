@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+import xarray as xr
+from xfeltor.spectral import _window
+
+
+def create_signal():
+    """create a chunked signal with a sine in time and noise"""
+    time = np.arange(512) * 0.1
+    x = np.arange(8.0)
+    rng = np.random.default_rng(0)
+    values = np.sin(2 * np.pi * 2.0 * time)[:, None] + rng.normal(size=(512, 8))
+    return xr.DataArray(values, dims=["time", "x"], coords=dict(time=time, x=x)).chunk(
+        time=128, x=4
+    )
+
+
+def test_spectrum_matches_scipy():
+    """test whether the spectrum equals scipy's periodogram"""
+    signal = pytest.importorskip("scipy.signal")
+    da = create_signal()
+    result = da.feltor.spectrum("time", detrend="linear")
+    freq, expected = signal.periodogram(
+        da.values, fs=10, window="hann", detrend="linear", axis=0
+    )
+
+    assert result.dims == ("x", "freq_time")
+    np.testing.assert_allclose(result["freq_time"], freq)
+    np.testing.assert_allclose(result.values, expected.T)
+
+
+@pytest.mark.parametrize("average", ["mean", "median"])
+def test_psd_matches_scipy(average):
+    """test whether the Welch estimate equals scipy's"""
+    signal = pytest.importorskip("scipy.signal")
+    da = create_signal()
+    result = da.feltor.psd(nperseg=64, average=average)
+    freq, expected = signal.welch(da.values, fs=10, nperseg=64, axis=0, average=average)
+
+    np.testing.assert_allclose(result["freq_time"], freq)
+    np.testing.assert_allclose(result.values, expected.T)
+
+
+def test_psd_peak():
+    """test whether the averaged spectrum peaks at the frequency of the sine"""
+    da = create_signal()
+    result = da.feltor.psd(nperseg=128, average_over="x")
+    assert result.dims == ("freq_time",)
+    assert float(result.idxmax("freq_time")) == pytest.approx(2.0, abs=10 / 128)
+
+
+def test_non_equidistant():
+    """test whether spectra of non-equidistant coordinates are refused"""
+    da = create_signal().assign_coords(x=np.arange(8.0) ** 2)
+    with pytest.raises(ValueError, match="not equidistant"):
+        da.feltor.spectrum("x")
+    assert _window("boxcar", 4).sum() == 4
@@ -16,7 +16,12 @@ feltordataarray, feltordataset and load are automatically imported by xfeltor
         ]
     )
 """
+
 from .load import open_feltordataset
+from .convert import convert_to_zarr
+from .render import render_runs
+from .follow import FeltorFollower
+from .instrument import profile
 from .feltordataarray import FeltorDataArrayAccessor
 from .feltordataset import FeltorDatasetAccessor
 
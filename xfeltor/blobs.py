@@ -0,0 +1,155 @@
+import numpy as np
+import xarray as xr
+import dask
+import dask.array
+
+
+def _ndimage():
+    try:
+        from scipy import ndimage
+    except ImportError:
+        raise ImportError(
+            "Tracking blobs requires scipy, install it with pip install xfeltor[calc]"
+        )
+    return ndimage
+
+
+def _cell_sizes(coord):
+    """Return the width of the cell around each point of a coordinate"""
+    if len(coord) < 2:
+        return np.ones(len(coord))
+    return np.abs(np.gradient(coord.astype(float)))
+
+
+def _detect(values, offset, threshold, x, y, min_size):
+    """Find the blobs in a block of frames with shape (time, y, x).
+
+    All frames are labelled at once, with connectivity only within a frame. The
+    properties of all blobs are reduced with bincount. Returns a dict of arrays
+    with one value per blob; frame counts from offset.
+    """
+    ndimage = _ndimage()
+    structure = np.zeros((3, 3, 3), dtype=bool)
+    structure[1] = ndimage.generate_binary_structure(2, 1)
+    labels, number = ndimage.label(values > threshold, structure=structure)
+
+    lab = labels.ravel()
+    frame = np.broadcast_to(np.arange(values.shape[0])[:, None, None], values.shape)
+    xx = np.broadcast_to(x[None, None, :], values.shape).ravel()
+    yy = np.broadcast_to(y[None, :, None], values.shape).ravel()
+    area = np.outer(_cell_sizes(y), _cell_sizes(x))
+    area = np.broadcast_to(area[None], values.shape).ravel()
+    weight = (values.ravel() - threshold) * area
+
+    def total(w):
+        return np.bincount(lab, w, minlength=number + 1)[1:]
+
+    count = np.bincount(lab, minlength=number + 1)[1:]
+    mass = total(weight)
+    index = np.arange(1, number + 1)
+    blobs = {
+        "frame": offset + np.round(total(frame.ravel()) / np.maximum(count, 1)),
+        "x": total(weight * xx) / mass,
+        "y": total(weight * yy) / mass,
+        "area": total(area),
+        "amplitude": np.asarray(ndimage.maximum(values, labels, index)),
+        "mass": mass,
+        "size": count,
+    }
+    keep = count >= min_size
+    return {name: blob[keep] for name, blob in blobs.items()}
+
+
+def _link(frames, x, y, max_distance):
+    """Assign a track id to every blob by linking each blob to the nearest blob of
+    the previous frame, if that is not closer to another blob"""
+    track = np.full(len(frames), -1)
+    next_track = 0
+    previous = np.array([], dtype=int)
+    for frame in np.unique(frames):
+        current = np.flatnonzero(frames == frame)
+        if len(previous) and frames[previous[0]] != frame - 1:
+            # No blobs in the frame before
+            previous = previous[:0]
+        distance = np.hypot(
+            x[current][:, None] - x[previous][None, :],
+            y[current][:, None] - y[previous][None, :],
+        )
+        order = np.argsort(distance, axis=None)
+        linked_current = set()
+        linked_previous = set()
+        for i, j in zip(*np.unravel_index(order, distance.shape)):
+            if distance[i, j] > max_distance:
+                break
+            if i in linked_current or j in linked_previous:
+                continue
+            track[current[i]] = track[previous[j]]
+            linked_current.add(i)
+            linked_previous.add(j)
+        for i in range(len(current)):
+            if i not in linked_current:
+                track[current[i]] = next_track
+                next_track += 1
+        previous = current
+    return track
+
+
+def _velocities(track, time, position):
+    """Velocity of every blob along its track, NaN for tracks of a single blob"""
+    velocity = np.full(len(track), np.nan)
+    order = np.lexsort((time, track))
+    starts = np.flatnonzero(np.diff(track[order], prepend=-1, append=-1))
+    for start, stop in zip(starts[:-1], starts[1:]):
+        members = order[start:stop]
+        if len(members) > 1:
+            velocity[members] = np.gradient(position[members], time[members])
+    return velocity
+
+
+def track_blobs(
+    da, threshold, x="x", y="y", time="time", max_distance=None, min_size=1
+):
+    """Detect and track blobs, see FeltorDataArrayAccessor.track_blobs"""
+    _ndimage()
+    da = da.transpose(time, y, x)
+    data = da.data
+    if not isinstance(data, dask.array.Array):
+        data = dask.array.from_array(data, chunks=(-1, -1, -1))
+    # Blobs must not be cut at chunk boundaries in space
+    data = data.rechunk({1: -1, 2: -1})
+
+    offsets = np.cumsum((0,) + data.chunks[0][:-1])
+    blocks = data.to_delayed().ravel()
+    x_values = da[x].values.astype(float)
+    y_values = da[y].values.astype(float)
+    detected = dask.compute(
+        *[
+            dask.delayed(_detect)(
+                block, offset, threshold, x_values, y_values, min_size
+            )
+            for block, offset in zip(blocks, offsets)
+        ]
+    )
+    blobs = {
+        name: np.concatenate([chunk[name] for chunk in detected])
+        for name in detected[0]
+    }
+
+    frames = blobs.pop("frame").astype(int)
+    times = da[time].values[frames].astype(float)
+    if max_distance is None:
+        max_distance = np.inf
+    track = _link(frames, blobs["x"], blobs["y"], max_distance)
+
+    ds = xr.Dataset(
+        {name: ("blob", values) for name, values in blobs.items()},
+        coords={"track": ("blob", track), time: ("blob", times)},
+    )
+    ds["vx"] = ("blob", _velocities(track, times, blobs["x"]))
+    ds["vy"] = ("blob", _velocities(track, times, blobs["y"]))
+    ds["x"].attrs["long_name"] = "center of mass in x"
+    ds["y"].attrs["long_name"] = "center of mass in y"
+    ds["amplitude"].attrs["long_name"] = f"maximum of {da.name}"
+    ds["mass"].attrs["long_name"] = "integral of the excess over the threshold"
+    ds["size"].attrs["long_name"] = "number of grid points"
+    return ds
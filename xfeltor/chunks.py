@@ -0,0 +1,126 @@
+import os
+import numpy as np
+import dask
+from dask.utils import parse_bytes
+
+# Chunk modes of open_feltordataset, named after the access pattern they optimize
+CHUNK_MODES = ["frames", "timeseries"]
+
+
+def chunk_budget():
+    """Return the target size of one chunk in bytes.
+
+    This is dask's "array.chunk-size" setting (128 MiB by default), reduced such
+    that one chunk per CPU fits into half of the available memory.
+    """
+    target = parse_bytes(dask.config.get("array.chunk-size"))
+    try:
+        available = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return target
+    return max(1, min(target, available // (2 * (os.cpu_count() or 1))))
+
+
+def metadata_variables(meta, names=None):
+    """Return the data variables of a FileMetadata, or those in names, as (sizes,
+    itemsize, on-disk chunks) for auto_chunks"""
+    variables = []
+    for name, variable in meta.variables.items():
+        if name in meta.coords or (names is not None and name not in names):
+            continue
+        sizes = {dim: meta.dims[dim] for dim in variable["dims"]}
+        disk = variable["chunking"] or list(sizes.values())
+        itemsize = np.dtype(variable["dtype"]).itemsize
+        variables.append((sizes, itemsize, dict(zip(sizes, disk))))
+    return variables
+
+
+def dataset_variables(ds):
+    """Return the data variables of a Dataset as (sizes, itemsize, on-disk chunks)
+    for auto_chunks. The on-disk chunks are taken from the encoding, or from the
+    dask chunks if the variable is already chunked."""
+    variables = []
+    for variable in ds.data_vars.values():
+        sizes = dict(zip(variable.dims, variable.shape))
+        disk = variable.encoding.get("chunksizes") or variable.encoding.get("chunks")
+        if disk is None and variable.chunks is not None:
+            disk = [chunks[0] for chunks in variable.chunks]
+        disk = dict(zip(sizes, disk or variable.shape))
+        variables.append((sizes, variable.dtype.itemsize, disk))
+    return variables
+
+
+def _align(size, disk, length):
+    """Round size down to a multiple of the on-disk chunk size, but not below one
+    on-disk chunk, and limit it to length"""
+    if size >= disk:
+        size -= size % disk
+    else:
+        size = disk
+    return max(1, min(size, length))
+
+
+def auto_chunks(variables, mode, concat_dim="time", target_bytes=None):
+    """Choose chunk sizes for the access pattern mode.
+
+    The chunks are chosen for the largest variable, such that one chunk has about
+    target_bytes and consists of whole on-disk chunks.
+
+    Parameters
+    ----------
+    variables : list of tuple
+        (sizes, itemsize, on-disk chunks) of each variable, see metadata_variables
+        and dataset_variables
+    mode : str
+        "frames": chunks of complete frames, as many as fit into target_bytes. If a
+        single frame is too large, it is split along its outermost dimensions.
+        This is fast for animations and diagnostics of single time steps.
+        "timeseries": chunks of the complete time series of small spatial tiles,
+        which is fast for extracting time series at single points.
+    concat_dim : str, optional
+        The name of the time dimension
+    target_bytes : int, optional
+        Size of one chunk in bytes, by default given by chunk_budget()
+
+    Returns
+    -------
+    dict
+        Chunk size of each dimension, as accepted by open_feltordataset
+    """
+    if mode not in CHUNK_MODES:
+        raise ValueError(f"chunks must be a dict or one of {CHUNK_MODES}, not {mode}")
+    if target_bytes is None:
+        target_bytes = chunk_budget()
+    if not variables:
+        return {}
+
+    sizes, itemsize, disk = max(
+        variables, key=lambda v: v[1] * np.prod(list(v[0].values()))
+    )
+    spatial = [dim for dim in sizes if dim != concat_dim]
+    chunks = {dim: sizes[dim] for dim in spatial}
+    n_time = sizes.get(concat_dim, 1)
+
+    if mode == "frames":
+        frame_bytes = itemsize * int(np.prod([sizes[dim] for dim in spatial]))
+        n_frames = max(1, target_bytes // frame_bytes)
+        chunks[concat_dim] = _align(n_frames, disk.get(concat_dim, 1), n_time)
+        if frame_bytes > target_bytes:
+            chunks[concat_dim] = 1
+            # Split the outermost dimensions, keeping the contiguous inner ones
+            remaining = frame_bytes
+            for dim in spatial:
+                remaining //= sizes[dim]
+                size = _align(max(1, target_bytes // remaining), disk[dim], sizes[dim])
+                chunks[dim] = size
+                if size * remaining <= target_bytes:
+                    break
+    else:
+        chunks[concat_dim] = -1
+        points = max(1, target_bytes // (itemsize * n_time))
+        # Tiles extend along the innermost dimensions first, which are contiguous
+        for dim in reversed(spatial):
+            size = _align(points, disk[dim], sizes[dim])
+            chunks[dim] = size
+            points = max(1, points // size)
+    return chunks
@@ -0,0 +1,126 @@
+import sys
+import logging
+import argparse
+from .convert import convert_to_zarr, zstd_compressor
+from .render import render_runs
+
+
+def _parse_chunks(text):
+    """Parse chunks given as "time=1,x=64" into a dict"""
+    if text is None:
+        return None
+    chunks = {}
+    for item in text.split(","):
+        dim, _, size = item.partition("=")
+        chunks[dim.strip()] = int(size)
+    return chunks
+
+
+def convert(argv=None):
+    """Console entry point xfeltor-convert: convert FELTOR output to Zarr"""
+    parser = argparse.ArgumentParser(
+        prog="xfeltor-convert",
+        description="Convert FELTOR NetCDF output, including restarted runs "
+        "consisting of several files, into a chunked Zarr store.",
+    )
+    parser.add_argument("datapath", nargs="+", help="FELTOR output files or glob")
+    parser.add_argument("store", help="Zarr store to create")
+    parser.add_argument(
+        "--chunks", help='chunk size of each dimension, e.g. "time=1" (the default)'
+    )
+    parser.add_argument(
+        "--timeseries", help="create a copy rechunked for point time series here"
+    )
+    parser.add_argument(
+        "--timeseries-chunks", help='chunk sizes of the copy, e.g. "time=256,x=32"'
+    )
+    parser.add_argument(
+        "--zstd", type=int, metavar="LEVEL", help="compress with Zstandard"
+    )
+    parser.add_argument(
+        "--restart-indices",
+        action="store_true",
+        help="keep duplicate time steps of restarted runs",
+    )
+    args = parser.parse_args(argv)
+
+    datapath = args.datapath[0] if len(args.datapath) == 1 else args.datapath
+    convert_to_zarr(
+        datapath,
+        args.store,
+        chunks=_parse_chunks(args.chunks),
+        compressor=None if args.zstd is None else zstd_compressor(args.zstd),
+        timeseries_store=args.timeseries,
+        timeseries_chunks=_parse_chunks(args.timeseries_chunks),
+        restart_indices=args.restart_indices,
+    )
+
+
+def render(argv=None):
+    """Console entry point xfeltor-render: save the animations of many runs"""
+    parser = argparse.ArgumentParser(
+        prog="xfeltor-render",
+        description="Save the animate_list animation of the same variables for "
+        "many FELTOR runs, rendering several runs at once without a display. Runs "
+        "whose animation is newer than their output files are skipped.",
+    )
+    parser.add_argument(
+        "runs",
+        nargs="+",
+        help="globs of runs: each matching directory is one run, all files "
+        "matching one glob form one restarted run",
+    )
+    parser.add_argument(
+        "-v",
+        "--variables",
+        nargs="+",
+        required=True,
+        help='variables to animate, "ions:y=100" selects the index 100 along y',
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="{dir}/animation",
+        help="file to create for each run without extension, {dir} and {run} are "
+        "replaced by the directory and name of the run (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--pattern", default="*.nc", help="files of a run in its directory"
+    )
+    parser.add_argument("--nrows", type=int, help="number of rows of plots")
+    parser.add_argument("--ncols", type=int, help="number of columns of plots")
+    parser.add_argument("--fps", type=float, default=10, help="frames per second")
+    parser.add_argument("--writer", default="pillow", help="pillow, mp4, webm or auto")
+    parser.add_argument("--t-start", type=float, help="first time to animate")
+    parser.add_argument("--t-end", type=float, help="last time to animate")
+    parser.add_argument("--time-stride", type=int, help="animate every n-th frame")
+    parser.add_argument("--max-frames", type=int, help="animate at most this many")
+    parser.add_argument("--chunks", help='chunk size of each dimension, e.g. "time=1"')
+    parser.add_argument(
+        "-j", "--processes", type=int, help="number of runs rendered at once"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="also render up to date animations"
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    jobs = render_runs(
+        args.runs,
+        args.variables,
+        output=args.output,
+        pattern=args.pattern,
+        processes=args.processes,
+        force=args.force,
+        chunks=_parse_chunks(args.chunks),
+        writer=args.writer,
+        nrows=args.nrows,
+        ncols=args.ncols,
+        fps=args.fps,
+        t_start=args.t_start,
+        t_end=args.t_end,
+        time_stride=args.time_stride,
+        max_frames=args.max_frames,
+    )
+    if any(job["status"] == "failed" for job in jobs):
+        sys.exit(1)
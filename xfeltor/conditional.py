@@ -0,0 +1,87 @@
+import numpy as np
+import xarray as xr
+
+
+def find_events(signal, threshold, window=0, overlap=False):
+    """Return the indices of the peaks of signal above threshold.
+
+    Each interval in which signal exceeds threshold gives one event at its
+    maximum. Events closer than window to the start or end of signal are dropped.
+    Unless overlap is True, of events closer than window to each other only the
+    largest is kept.
+
+    Parameters
+    ----------
+    signal : 1d array
+    threshold : float or 0d DataArray
+    window : int, optional
+        Number of time steps before and after each event
+    overlap : bool, optional
+
+    Returns
+    -------
+    array of int
+        Sorted indices of the events
+    """
+    signal = np.asarray(signal)
+    threshold = float(threshold)
+    above = np.concatenate([[False], signal > threshold, [False]])
+    edges = np.flatnonzero(np.diff(above.astype(int)))
+    starts, stops = edges[::2], edges[1::2]
+    peaks = np.array(
+        [start + np.argmax(signal[start:stop]) for start, stop in zip(starts, stops)],
+        dtype=int,
+    )
+    peaks = peaks[(peaks >= window) & (peaks < len(signal) - window)]
+    if overlap or window == 0:
+        return peaks
+
+    kept = []
+    for peak in peaks[np.argsort(signal[peaks])[::-1]]:
+        if all(abs(peak - other) > window for other in kept):
+            kept.append(peak)
+    return np.sort(np.array(kept, dtype=int))
+
+
+def conditional_average(
+    ds, reference, variables, threshold, window, overlap=False, time="time", load=True
+):
+    """Conditionally average variables of ds around the peaks of reference, see
+    FeltorDatasetAccessor.conditional_average"""
+    threshold = float(threshold)
+    if isinstance(reference, str):
+        reference = ds[reference]
+    if reference.dims != (time,):
+        raise ValueError(f"The reference must be a time series along {time}")
+    if variables is None:
+        variables = [name for name in ds.data_vars if time in ds[name].dims]
+    fields = ds[list(variables)]
+
+    values = np.asarray(reference.values)
+    events = find_events(values, threshold, window, overlap)
+    lags = np.arange(-window, window + 1)
+    # One vectorized selection of all windows, with the events in the order of
+    # time, so that dask reads every chunk only once
+    index = xr.DataArray(events[:, None] + lags[None, :], dims=("event", "lag"))
+
+    windows = fields.isel({time: index})
+    result = windows.mean("event")
+    result["reference"] = (
+        "lag",
+        (
+            values[index.values].mean(axis=0)
+            if len(events)
+            else np.full(len(lags), np.nan)
+        ),
+    )
+    times = reference[time].values
+    spacing = np.mean(np.diff(times)) if len(times) > 1 else 1.0
+    result = result.drop_vars(time, errors="ignore")
+    result = result.assign_coords(lag=lags * spacing)
+    result["event_time"] = ("event", times[events])
+    result["event_amplitude"] = ("event", values[events])
+    result.attrs["events"] = len(events)
+    result.attrs["threshold"] = threshold
+    if load:
+        result = result.compute()
+    return result
@@ -0,0 +1,126 @@
+from .load import open_feltordataset
+
+
+def _zarr_major_version():
+    try:
+        import zarr
+    except ImportError:
+        raise ImportError(
+            "Converting to Zarr requires the zarr package, install it with "
+            "pip install xfeltor[zarr]"
+        )
+    return int(zarr.__version__.split(".")[0])
+
+
+def zstd_compressor(level=3):
+    """Return a Zstandard codec for the installed version of zarr"""
+    if _zarr_major_version() >= 3:
+        from zarr.codecs import ZstdCodec
+
+        return ZstdCodec(level=level)
+    from numcodecs import Zstd
+
+    return Zstd(level=level)
+
+
+def _zarr_kwargs(ds, compressor):
+    """Return the keyword arguments of to_zarr using compressor for all data
+    variables"""
+    version = _zarr_major_version()
+    kwargs = {}
+    if version >= 3:
+        # Consolidated metadata is not part of the Zarr v3 specification
+        kwargs["consolidated"] = False
+    if compressor is not None:
+        if version >= 3:
+            encoding = {"compressors": [compressor]}
+        else:
+            encoding = {"compressor": compressor}
+        kwargs["encoding"] = {name: encoding for name in ds.data_vars}
+    return kwargs
+
+
+def _timeseries_chunks(ds, concat_dim, target_bytes=32 * 2**20, time_chunk=256):
+    """Return chunks with time_chunk steps along concat_dim and square tiles in the
+    other dimensions, such that a chunk of a float64 variable has at most about
+    target_bytes"""
+    spatial = [dim for dim in ds.dims if dim != concat_dim]
+    time_chunk = min(time_chunk, ds.sizes.get(concat_dim, 1))
+    points = max(1, target_bytes // (8 * time_chunk))
+    tile = max(1, int(points ** (1 / max(1, len(spatial)))))
+    chunks = {dim: min(tile, ds.sizes[dim]) for dim in spatial}
+    chunks[concat_dim] = time_chunk
+    return chunks
+
+
+def convert_to_zarr(
+    datapath,
+    store,
+    chunks=None,
+    compressor=None,
+    timeseries_store=None,
+    timeseries_chunks=None,
+    concat_dim="time",
+    **kwargs,
+):
+    """Converts FELTOR output into a Zarr store, optimized for analysis.
+
+    FELTOR writes NetCDF with chunking tuned for the simulation. The run, which
+    may consist of several restart files, is opened with open_feltordataset and
+    streamed chunk by chunk into a Zarr store. By default each chunk holds one
+    complete frame, which is fast for animations and spatial diagnostics. An
+    optional second store holds a copy rechunked into long time series of small
+    spatial tiles, which is fast for extracting time series at single points.
+    Both stores can be opened with open_feltordataset again.
+
+    Parameters
+    ----------
+    datapath : str or list of str
+        FELTOR output files, see open_feltordataset
+    store : str
+        Path of the Zarr store to create. An existing store is overwritten.
+    chunks : dict, optional
+        Chunk size of each dimension in the store, defaults to {concat_dim: 1},
+        i.e. one frame per chunk
+    compressor : codec, optional
+        Compressor of the data variables, e.g. zstd_compressor(level=5). Defaults
+        to the default compressor of zarr.
+    timeseries_store : str, optional
+        If passed, also create a copy of the data in this store, rechunked for
+        fast time series extraction at single points
+    timeseries_chunks : dict, optional
+        Chunk size of each dimension in timeseries_store, defaults to 256 time
+        steps and spatial tiles of about 32 MB per chunk
+    concat_dim : str, optional
+        The name of the time dimension
+    kwargs : optional
+        Keyword arguments are passed on to open_feltordataset
+
+    Returns
+    -------
+    xarray.Dataset
+        The converted dataset, opened from store
+    """
+    _zarr_major_version()
+    if chunks is None:
+        chunks = {concat_dim: 1}
+
+    ds = open_feltordataset(datapath, concat_dim=concat_dim, **kwargs)
+    ds = ds.chunk(chunks)
+    for variable in ds.variables.values():
+        # The netCDF encoding (on-disk chunks, compression) does not apply to Zarr
+        variable.encoding = {}
+    ds.to_zarr(store, mode="w", **_zarr_kwargs(ds, compressor))
+    ds.close()
+
+    converted = open_feltordataset(store)
+    if timeseries_store is not None:
+        if timeseries_chunks is None:
+            timeseries_chunks = _timeseries_chunks(converted, concat_dim)
+        timeseries = converted.chunk(timeseries_chunks)
+        for variable in timeseries.variables.values():
+            variable.encoding = {}
+        timeseries.to_zarr(
+            timeseries_store, mode="w", **_zarr_kwargs(timeseries, compressor)
+        )
+    return converted
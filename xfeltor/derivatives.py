@@ -0,0 +1,84 @@
+import numpy as np
+import xarray as xr
+from .interpolate import dg_cells, _gauss_legendre_nodes
+
+
+def _dg_derivative_matrix(n):
+    """Return the matrix D with D[j, k] the derivative of the k-th Lagrange
+    polynomial through the Gauss-Legendre nodes at node j, in [-1, 1]"""
+    xi = _gauss_legendre_nodes(n)
+    matrix = np.zeros((n, n))
+    for k in range(n):
+        others = np.delete(xi, k)
+        denominator = np.prod(xi[k] - others)
+        for j in range(n):
+            # Product rule: sum over the factor that is differentiated
+            terms = [np.prod(xi[j] - np.delete(others, m)) for m in range(len(others))]
+            matrix[j, k] = np.sum(terms) / denominator
+    return matrix
+
+
+def _dg_derivative(values, n, h):
+    """Derivative of the polynomial of each cell at its nodes along the last axis"""
+    cells = values.reshape(values.shape[:-1] + (-1, n))
+    derivative = cells @ _dg_derivative_matrix(n).T * (2 / h)
+    return derivative.reshape(values.shape)
+
+
+def _difference(values, coord, period):
+    """Second order centered differences along the last axis, periodic if period
+    is given, otherwise one-sided at the edges"""
+    if period is None:
+        return np.gradient(values, coord, axis=-1, edge_order=2)
+    coord = np.concatenate([[coord[-1] - period], coord, [coord[0] + period]])
+    values = np.concatenate([values[..., -1:], values, values[..., :1]], axis=-1)
+    return np.gradient(values, coord, axis=-1)[..., 1:-1]
+
+
+def gradient(da, dim, n=1, boundary="periodic"):
+    """Derivative of da along dim, consistent with the dG grid.
+
+    For n > 1 this is the derivative of the polynomial in each cell at the
+    Gauss-Legendre nodes, which is exact for the data as represented in FELTOR
+    and needs no boundary condition. For n = 1 second order centered differences
+    are used.
+
+    Parameters
+    ----------
+    da : xarray.DataArray
+    dim : str
+        Dimension along which to differentiate
+    n : int, optional
+        Number of polynomial coefficients per cell
+    boundary : str, optional
+        "periodic" or "edge" (one-sided differences), used for n = 1
+
+    Returns
+    -------
+    xarray.DataArray
+        Computed chunk by chunk with dask, dim is merged into one chunk
+    """
+    coord = da[dim].values.astype(float)
+    if n > 1:
+        _, h = dg_cells(coord, n)
+        func, kwargs = _dg_derivative, {"n": n, "h": h}
+    elif boundary in ["periodic", "edge"]:
+        period = None
+        if boundary == "periodic":
+            _, h = dg_cells(coord, 1)
+            period = len(coord) * h
+        func, kwargs = _difference, {"coord": coord, "period": period}
+    else:
+        raise ValueError(f'boundary must be "periodic" or "edge", not {boundary}')
+
+    result = xr.apply_ufunc(
+        func,
+        da,
+        kwargs=kwargs,
+        input_core_dims=[[dim]],
+        output_core_dims=[[dim]],
+        dask="parallelized",
+        output_dtypes=[np.result_type(da.dtype, float)],
+        dask_gufunc_kwargs={"allow_rechunk": True},
+    )
+    return result.transpose(*da.dims)
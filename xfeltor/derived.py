@@ -0,0 +1,176 @@
+import re
+from collections.abc import Mapping
+import dask
+import xarray as xr
+from .derivatives import gradient
+from .interpolate import _dg_orders
+from .params import parameters
+
+# Functions computing derived fields from a DerivedFields instance by name
+_DERIVED = {}
+
+
+def register_derived(name, long_name=None, requires=()):
+    """Decorator registering a function which computes the derived field name.
+
+    The function receives the DerivedFields of a dataset, which gives access to
+    its variables, other derived fields and the derivative d(da, dim), e.g.
+
+    @register_derived("vExB_x", "radial E x B velocity", requires=["potential"])
+    def vExB_x(fields):
+        return -fields.d(fields.ds["potential"], "y")
+
+    The field is only available for datasets containing all variables or derived
+    fields in requires.
+    """
+
+    def register(func):
+        _DERIVED[name] = (func, long_name, tuple(requires))
+        return func
+
+    return register
+
+
+# Derivatives of variables, e.g. "dx_electrons"
+_DERIVATIVE = re.compile(r"d(?P<dim>x|y)_(?P<variable>\w+)")
+
+# FELTOR boundary conditions, of which only PER is periodic
+_PERIODIC = ["PER", "periodic"]
+
+
+class DerivedFields(Mapping):
+    """Lazily computed fields derived from the variables of a FELTOR dataset.
+
+    Every field is a dask graph built on first access and memoized, e.g.
+
+    ds.feltor.derived["vExB_x"]           # radial E x B velocity
+    ds.feltor.derived["dx_electrons"]     # radial derivative of any variable
+    ds.feltor.derived.persist(["vExB_x"]) # compute and keep in memory
+    ds.feltor.derived.save("derived.nc")  # store the computed fields
+    ds.feltor.derived.load("derived.nc")  # reuse them for a new session
+
+    Derivatives use the dG polynomials for n > 1 and centered differences with
+    the boundary conditions bc_x and bc_y of the input parameters for n = 1, see
+    xfeltor.derivatives.gradient. E x B quantities assume B = 1 as in FELTOR
+    units.
+    """
+
+    def __init__(self, ds):
+        self.ds = ds
+        self._fields = {}
+
+    def __getitem__(self, name):
+        if name not in self._fields:
+            self._fields[name] = self._compute(name)
+        return self._fields[name]
+
+    def __iter__(self):
+        return iter(self.available())
+
+    def __len__(self):
+        return len(self.available())
+
+    def __contains__(self, name):
+        return (
+            name in self._fields
+            or self._registered(name)
+            or self._derivative(name) is not None
+        )
+
+    def _registered(self, name):
+        """Return True if name is registered and all its inputs are available"""
+        if name not in _DERIVED:
+            return False
+        _, _, requires = _DERIVED[name]
+        return all(field in self.ds.data_vars or field in self for field in requires)
+
+    def _derivative(self, name):
+        match = _DERIVATIVE.fullmatch(name)
+        if match and match["variable"] in self.ds.data_vars:
+            return match
+        return None
+
+    def available(self):
+        """Return the names of all fields and derivatives which can be computed
+        from the variables of the dataset"""
+        names = [name for name in _DERIVED if self._registered(name)]
+        names += [f"d{dim}_{name}" for name in self.ds.data_vars for dim in "xy"]
+        return names + [name for name in self._fields if name not in names]
+
+    def _compute(self, name):
+        match = self._derivative(name)
+        if self._registered(name):
+            func, long_name, _ = _DERIVED[name]
+            field = func(self)
+        elif match:
+            field = self.d(self.ds[match["variable"]], match["dim"])
+            long_name = f"d{match['variable']}/d{match['dim']}"
+        else:
+            raise KeyError(f"No derived field {name}")
+        field = field.rename(name)
+        if long_name is not None:
+            field.attrs["long_name"] = long_name
+        return field
+
+    def _boundary(self, dim):
+        """Return the boundary condition of dim from the input parameters"""
+        if "inputfile" not in self.ds.attrs:
+            return "periodic"
+        params = parameters(self.ds.attrs["inputfile"])
+        bc = params.find(f"bc_{dim}", params.find(f"bc{dim}"))
+        return "periodic" if bc is None or bc in _PERIODIC else "edge"
+
+    def d(self, da, dim):
+        """Derivative of da along dim, consistent with the grid of the dataset"""
+        try:
+            n = _dg_orders(self.ds, None, [dim])[dim]
+        except ValueError:
+            n = 1
+        return gradient(da, dim, n, self._boundary(dim))
+
+    def persist(self, names=None):
+        """Compute the fields in names (by default all accessed so far) and keep
+        them in memory as dask arrays"""
+        names = list(self._fields) if names is None else names
+        fields = dask.persist(*[self[name] for name in names])
+        self._fields.update(zip(names, fields))
+
+    def save(self, path, names=None):
+        """Write the fields in names (by default all accessed so far) to the
+        netCDF file path, computing them chunk by chunk"""
+        names = list(self._fields) if names is None else names
+        xr.Dataset({name: self[name] for name in names}).to_netcdf(path)
+
+    def load(self, path):
+        """Use the fields stored with save() in path instead of computing them"""
+        stored = xr.open_dataset(path, chunks={}, decode_times=False)
+        self._fields.update(stored.data_vars.items())
+
+
+@register_derived("vExB_x", "radial E x B velocity", requires=["potential"])
+def _vExB_x(fields):
+    return -fields.d(fields.ds["potential"], "y")
+
+
+@register_derived("vExB_y", "poloidal E x B velocity", requires=["potential"])
+def _vExB_y(fields):
+    return fields.d(fields.ds["potential"], "x")
+
+
+@register_derived("E_x", "radial electric field", requires=["potential"])
+def _E_x(fields):
+    return -fields.d(fields.ds["potential"], "x")
+
+
+@register_derived("E_y", "poloidal electric field", requires=["potential"])
+def _E_y(fields):
+    return -fields.d(fields.ds["potential"], "y")
+
+
+@register_derived(
+    "vorticity_ExB",
+    "E x B vorticity, the Laplacian of the potential",
+    requires=["vExB_x", "vExB_y"],
+)
+def _vorticity_ExB(fields):
+    return fields.d(fields["vExB_y"], "x") - fields.d(fields["vExB_x"], "y")
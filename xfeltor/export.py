@@ -0,0 +1,282 @@
+import os
+import time
+import logging
+import subprocess
+import warnings
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+from matplotlib.animation import FFMpegWriter, PillowWriter
+from PIL import Image
+from .instrument import instrumented, stage, _stacklevel
+
+logger = logging.getLogger(__name__)
+
+
+def _split_frames(n_frames, n_parts):
+    """Split range(n_frames) into at most n_parts contiguous ranges"""
+    edges = np.linspace(0, n_frames, min(n_parts, n_frames) + 1).astype(int)
+    return [range(start, stop) for start, stop in zip(edges[:-1], edges[1:])]
+
+
+def _draw_frame(anim, i):
+    """Draw frame i of an animatplot.Animation and return it as RGB array"""
+    for block in anim.blocks:
+        block._update(i)
+    if anim._has_slider:
+        anim.slider.set_val(i)
+    anim.fig.canvas.draw()
+    return np.asarray(anim.fig.canvas.buffer_rgba())[..., :3].copy()
+
+
+# The animation of a worker process, created once by _init_worker
+_worker_animation = None
+
+
+def _init_worker(build):
+    """Worker initializer: create the animation with build() using the Agg backend"""
+    global _worker_animation
+    plt.switch_backend("Agg")
+    warnings.filterwarnings("ignore", "Animation was deleted", UserWarning)
+    _worker_animation = build()
+
+
+def _render_frames(frames):
+    """Worker function: rasterize a range of frames of the worker's animation"""
+    return [_draw_frame(_worker_animation, i) for i in frames]
+
+
+# Codec used by ffmpeg for each video format. yuv420p is the pixel format most
+# players understand, and it requires the frames to have an even width and height.
+_FFMPEG_CODECS = {"mp4": "libx264", "webm": "libvpx-vp9"}
+_FFMPEG_ARGS = ["-pix_fmt", "yuv420p", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2"]
+
+
+def _resolve_writer(writer):
+    """Return the file format to write: "gif", "mp4" or "webm".
+
+    "auto" selects mp4 if ffmpeg is installed. If a video format is requested but
+    ffmpeg is not installed, fall back to a gif written with Pillow.
+    """
+    if writer == "pillow":
+        return "gif"
+    if writer not in ["auto", *_FFMPEG_CODECS]:
+        raise ValueError(f"Unrecognised value for writer={writer}")
+    if FFMpegWriter.isAvailable():
+        return "mp4" if writer == "auto" else writer
+    if writer != "auto":
+        warnings.warn(
+            f"ffmpeg is not installed, saving a gif instead of {writer}",
+            stacklevel=_stacklevel(),
+        )
+    return "gif"
+
+
+def _report(filename, start, encode_seconds):
+    """Log and return the size and the render and encode times of a saved
+    animation"""
+    seconds = time.perf_counter() - start
+    report = {
+        "filename": filename,
+        "bytes": os.path.getsize(filename),
+        "seconds": seconds,
+        "render_seconds": seconds - encode_seconds,
+        "encode_seconds": encode_seconds,
+    }
+    logger.info(
+        "saved %s (%.2f MB) in %.2f s, of which %.2f s encoding",
+        filename,
+        report["bytes"] / 1e6,
+        seconds,
+        encode_seconds,
+    )
+    return report
+
+
+class _TimedFinish:
+    """Mixin for matplotlib writers recording the time spent in finish(), i.e. in
+    writing the file after all frames are rendered, as stage "export.encode" """
+
+    encode_seconds = 0.0
+
+    def finish(self):
+        start = time.perf_counter()
+        with stage("export.encode"):
+            super().finish()
+        self.encode_seconds = time.perf_counter() - start
+
+
+class _PillowWriter(_TimedFinish, PillowWriter):
+    pass
+
+
+class _FFMpegWriter(_TimedFinish, FFMpegWriter):
+    pass
+
+
+@instrumented("export.save")
+def save_animation(anim, save_as, fps=10, writer="pillow"):
+    """Saves an animatplot.Animation, rendering the frames one after another.
+
+    Parameters
+    ----------
+    anim : animatplot.Animation
+    save_as : str
+        Name of the file to create, without the file extension
+    fps : float, optional
+        Frames per second of the resulting file
+    writer : str, optional
+        "pillow" writes a gif with matplotlib's PillowWriter. "mp4" and "webm" pipe
+        the raw frames into ffmpeg and fall back to "pillow" if ffmpeg is not
+        installed. "auto" selects "mp4" if ffmpeg is installed and "pillow" otherwise.
+
+    Returns
+    -------
+    dict
+        The "filename", its size in "bytes", the time spent saving in "seconds",
+        of which "encode_seconds" were spent writing the file after all frames were
+        rendered and "render_seconds" rendering the frames. ffmpeg encodes while
+        the frames are rendered, so part of its work counts as render_seconds.
+    """
+    start = time.perf_counter()
+    file_format = _resolve_writer(writer)
+    filename = f"{save_as}.{file_format}"
+    if file_format == "gif":
+        movie_writer = _PillowWriter(fps=fps)
+    else:
+        codec = _FFMPEG_CODECS[file_format]
+        movie_writer = _FFMpegWriter(fps, codec, extra_args=_FFMPEG_ARGS)
+    anim.save(filename, writer=movie_writer)
+    return _report(filename, start, movie_writer.encode_seconds)
+
+
+class _PillowSink:
+    """Collects RGB frames and writes them as an animated gif with Pillow,
+    like matplotlib.animation.PillowWriter"""
+
+    def __init__(self, filename, fps):
+        self.filename = filename
+        self.fps = fps
+        self._frames = []
+
+    def write(self, image):
+        self._frames.append(Image.fromarray(image))
+
+    def finish(self):
+        self._frames[0].save(
+            self.filename,
+            save_all=True,
+            append_images=self._frames[1:],
+            duration=int(1000 / self.fps),
+            loop=0,
+        )
+
+
+class _FFMpegSink:
+    """Streams RGB frames through a pipe into ffmpeg"""
+
+    def __init__(self, filename, fps, file_format):
+        self.filename = filename
+        self.fps = fps
+        self.file_format = file_format
+        self._process = None
+
+    def write(self, image):
+        if self._process is None:
+            height, width, _ = image.shape
+            command = [
+                mpl.rcParams["animation.ffmpeg_path"],
+                "-y",
+                "-loglevel",
+                "error",
+                "-f",
+                "rawvideo",
+                "-pix_fmt",
+                "rgb24",
+                "-s",
+                f"{width}x{height}",
+                "-r",
+                str(self.fps),
+                "-i",
+                "-",
+                "-c:v",
+                _FFMPEG_CODECS[self.file_format],
+                *_FFMPEG_ARGS,
+                self.filename,
+            ]
+            self._process = subprocess.Popen(command, stdin=subprocess.PIPE)
+        self._process.stdin.write(np.ascontiguousarray(image).tobytes())
+
+    def finish(self):
+        self._process.stdin.close()
+        if self._process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed to write {self.filename}")
+
+
+@instrumented("export.save")
+def save_parallel(build, n_frames, save_as, fps=10, processes=None, writer="pillow"):
+    """Renders the frames of an animation in a pool of processes and writes them
+    in order into one file.
+
+    The time axis is split into contiguous ranges of frames. Each worker process
+    creates the animation once by calling build() and then rasterizes the ranges of
+    frames it is given with the Agg backend, sending the images back to this process.
+
+    Parameters
+    ----------
+    build : callable
+        Picklable function without arguments which returns an animatplot.Animation,
+        e.g. a functools.partial of xfeltor.plotting.animate_pcolormesh. It is called
+        once in each worker process, so it should load the data lazily.
+    n_frames : int
+        Number of frames of the animation
+    save_as : str
+        Name of the file to create, without the file extension
+    fps : float, optional
+        Frames per second of the resulting file
+    processes : int, optional
+        Number of worker processes, defaults to the number of CPUs
+    writer : str, optional
+        "pillow", "mp4", "webm" or "auto", see save_animation
+
+    Returns
+    -------
+    dict
+        The "filename", its size in "bytes", the time spent saving in "seconds",
+        of which "encode_seconds" were spent passing the rendered frames to the
+        writer and writing the file and "render_seconds" waiting for the workers
+    """
+    start = time.perf_counter()
+    if processes is None:
+        processes = os.cpu_count()
+
+    # Use more ranges than processes so that the results arrive in order steadily
+    ranges = _split_frames(n_frames, 4 * processes)
+
+    file_format = _resolve_writer(writer)
+    filename = f"{save_as}.{file_format}"
+    if file_format == "gif":
+        sink = _PillowSink(filename, fps)
+    else:
+        sink = _FFMpegSink(filename, fps, file_format)
+
+    context = multiprocessing.get_context("spawn")
+    with (
+        ProcessPoolExecutor(
+            processes, mp_context=context, initializer=_init_worker, initargs=(build,)
+        ) as pool,
+        stage("export.render"),
+    ):
+        encode_seconds = 0.0
+        for images in pool.map(_render_frames, ranges):
+            encode_start = time.perf_counter()
+            for image in images:
+                sink.write(image)
+            encode_seconds += time.perf_counter() - encode_start
+    encode_start = time.perf_counter()
+    with stage("export.encode"):
+        sink.finish()
+    encode_seconds += time.perf_counter() - encode_start
+    return _report(filename, start, encode_seconds)
@@ -1,6 +1,9 @@
 import xarray as xr
 from xarray import register_dataarray_accessor
-from .plotting import animate_pcolormesh, _create_norm, animate_line
+from .plotting import animate_pcolormesh, animate_line
+from .spectral import spectrum, psd
+from .blobs import track_blobs
+from .instrument import instrumented
 from typing import Union, Optional
 import matplotlib.pyplot as plt
 import animatplot as amp
@@ -41,6 +44,7 @@ class FeltorDataArrayAccessor:
         styled = partial(prettyformat, indent=4, compact=False)
         return "<xfeltor.FeltorDataset>" + "\n{}\n".format(styled(self.data))
 
+    @instrumented("feltor.animate2D")
     def animate2D(
         self,
         animate_over: str = "time",
@@ -52,6 +56,13 @@ class FeltorDataArrayAccessor:
         save_as: Union[bool, str] = None,
         ax: plt.Axes = None,
         logscale: Union[bool, float] = None,
+        robust: bool = False,
+        lazy: bool = False,
+        t_start: float = None,
+        t_end: float = None,
+        time_stride: int = None,
+        max_frames: int = None,
+        renderer: str = "auto",
         **kwargs: dict,
     ) -> Union[amp.Animation, amp.blocks.Pcolormesh]:
         """
@@ -88,6 +99,7 @@ class FeltorDataArrayAccessor:
             If str is passed, save the animation as save_as+'.gif'.
             If True is passed, save the animation with a default name,
             '<variable name>_over_<animate_over>.gif'
+            The size and timings of the file are stored in anim.export_report.
         ax : matplotlib.pyplot.axes object, optional
             Axis on which to plot the gif
         logscale : bool or float, optional
@@ -96,14 +108,34 @@ class FeltorDataArrayAccessor:
             threshold of a symmetric logarithmic scale as
             linthresh=min(abs(vmin),abs(vmax))*logscale, defaults to 1e-5 if True is
             passed.
+        robust : bool, optional
+            If True, use the 2nd and 98th percentiles of the data instead of its
+            minimum and maximum as default color limits.
+        lazy : bool, optional
+            If True, read each frame from the data only when it is drawn instead of
+            loading the whole time series into memory.
+        t_start : float, optional
+            First value of animate_over to animate. The frames are selected lazily,
+            before any data is loaded and before the color limits are computed.
+        t_end : float, optional
+            Last value of animate_over to animate
+        time_stride : int, optional
+            Animate only every time_stride-th frame
+        max_frames : int, optional
+            Increase time_stride such that at most max_frames frames are animated
+        renderer : str, optional
+            "image" draws uniform grids as image, updating only its pixels for each
+            frame, "pcolormesh" draws any grid with pcolormesh. "auto" (default)
+            selects "image" for uniform grids.
         kwargs : dict, optional
             Additional keyword arguments are passed on to the plotting function
-            (animatplot.blocks.Pcolormesh).
+            (animatplot.blocks.Pcolormesh, or imshow for the "image" renderer).
         Returns
         -------
-        animation or blocks
+        animation or block
             If animate==True, returns an animatplot.Animation object, otherwise
-            returns a list of animatplot.blocks.Pcolormesh instances.
+            returns the block, an animatplot.blocks.Pcolormesh instance or an image
+            block with the AxesImage as attribute image.
         """
 
         data = self.data
@@ -115,10 +147,8 @@ class FeltorDataArrayAccessor:
                 f"Data passed has an unsupported number of dimensions ({n_dims})"
             )
 
-        vmin = kwargs.pop("vmin") if "vmin" in kwargs else data.min().values
-        vmax = kwargs.pop("vmax") if "vmax" in kwargs else data.max().values
-        kwargs["norm"] = _create_norm(logscale, kwargs.get("norm", None), vmin, vmax)
-
+        # The color limits are determined by animate_pcolormesh in a single pass
+        # over the data, so they are simply passed on here
         print(
             f"{variable} data passed has {n_dims} dimensions - will use "
             "animatplot.blocks.Pcolormesh()"
@@ -133,9 +163,18 @@ class FeltorDataArrayAccessor:
             fps=fps,
             save_as=save_as,
             ax=ax,
+            logscale=logscale,
+            robust=robust,
+            lazy=lazy,
+            t_start=t_start,
+            t_end=t_end,
+            time_stride=time_stride,
+            max_frames=max_frames,
+            renderer=renderer,
             **kwargs,
         )
 
+    @instrumented("feltor.animate1D")
     def animate1D(
         self,
         animate_over=None,
@@ -144,6 +183,11 @@ class FeltorDataArrayAccessor:
         fps=10,
         save_as=None,
         ax=None,
+        lazy=False,
+        t_start=None,
+        t_end=None,
+        time_stride=None,
+        max_frames=None,
         **kwargs,
     ):
         """
@@ -170,11 +214,24 @@ class FeltorDataArrayAccessor:
             If str is passed, save the animation as save_as+'.gif'.
             If True is passed, save the animation with a default name,
             '<variable name>_over_<animate_over>.gif'
+            The size and timings of the file are stored in anim.export_report.
         ax : Axes, optional
             A matplotlib axes instance to plot to. If None, create a new
             figure and axes, and plot to that
         aspect : str or None, optional
             Argument to set_aspect(), defaults to "auto"
+        lazy : bool, optional
+            If True, read each frame from the data only when it is drawn instead of
+            loading the whole time series into memory.
+        t_start : float, optional
+            First value of animate_over to animate. The frames are selected lazily,
+            before any data is loaded and before the color limits are computed.
+        t_end : float, optional
+            Last value of animate_over to animate
+        time_stride : int, optional
+            Animate only every time_stride-th frame
+        max_frames : int, optional
+            Increase time_stride such that at most max_frames frames are animated
         kwargs : dict, optional
             Additional keyword arguments are passed on to the plotting function
             (animatplot.blocks.Line).
@@ -203,5 +260,126 @@ class FeltorDataArrayAccessor:
             fps=fps,
             save_as=save_as,
             ax=ax,
+            lazy=lazy,
+            t_start=t_start,
+            t_end=t_end,
+            time_stride=time_stride,
+            max_frames=max_frames,
             **kwargs,
         )
+
+    def spectrum(self, dim, window="hann", detrend="constant", average_over=None):
+        """Power spectral density along dim, e.g. a wavenumber spectrum for dim="y"
+        or a frequency spectrum for dim="time".
+
+        The spectrum is computed chunk by chunk with dask; only dim must fit into
+        one chunk, the other dimensions stay chunked. Averages over other
+        dimensions are taken without loading the spectra of all chunks at once.
+
+        Parameters
+        ----------
+        dim : str
+            Dimension along which to compute the spectrum. Its coordinate must be
+            equidistant.
+        window : str or array, optional
+            Window applied before the transform: "hann", "hamming", "blackman",
+            "boxcar" or an array of the length of dim
+        detrend : str, optional
+            Remove the "constant" mean or a "linear" trend first, or None
+        average_over : str or list of str, optional
+            Dimensions over which to average the spectra, e.g. "time"
+
+        Returns
+        -------
+        xarray.DataArray
+            One-sided power spectral density, with dim replaced by the frequencies
+            freq_<dim> in cycles per unit of the coordinate
+        """
+        return spectrum(self.data, dim, window, detrend, average_over)
+
+    def psd(
+        self,
+        dim="time",
+        nperseg=256,
+        noverlap=None,
+        window="hann",
+        detrend="constant",
+        average="mean",
+        average_over=None,
+    ):
+        """Welch estimate of the power spectral density along dim.
+
+        The data is split into overlapping segments of nperseg points, whose
+        windowed periodograms are averaged. This is computed chunk by chunk with
+        dask; only dim must fit into one chunk, so open the data with
+        chunks="timeseries" for frequency spectra of large runs.
+
+        Parameters
+        ----------
+        dim : str, optional
+            Dimension along which to compute the spectrum
+        nperseg : int, optional
+            Length of each segment
+        noverlap : int, optional
+            Number of points by which segments overlap, by default nperseg // 2
+        window : str or array, optional
+            Window of each segment, see spectrum()
+        detrend : str, optional
+            Detrending of each segment, see spectrum()
+        average : str, optional
+            Average the periodograms of the segments with their "mean" or their
+            bias corrected "median"
+        average_over : str or list of str, optional
+            Dimensions over which to average the spectra, e.g. ["x", "y"]
+
+        Returns
+        -------
+        xarray.DataArray
+            One-sided power spectral density, with dim replaced by freq_<dim>
+        """
+        return psd(
+            self.data,
+            dim,
+            nperseg,
+            noverlap,
+            window,
+            detrend,
+            average,
+            average_over,
+        )
+
+    def track_blobs(
+        self, threshold, x="x", y="y", time="time", max_distance=None, min_size=1
+    ):
+        """Detects blobs in every frame and links them to trajectories.
+
+        A blob is a connected region in which the data exceeds threshold. The
+        frames are labelled chunk by chunk in parallel with dask, each chunk with
+        one vectorized call of scipy.ndimage.label, so that only one chunk of
+        frames per worker is in memory. Each blob is then linked to the nearest
+        blob of the previous frame. Requires scipy.
+
+        Parameters
+        ----------
+        threshold : float
+            Values above threshold belong to blobs
+        x, y : str, optional
+            The spatial dimensions
+        time : str, optional
+            The time dimension
+        max_distance : float, optional
+            Blobs in consecutive frames further apart than this start a new track.
+            By default there is no limit.
+        min_size : int, optional
+            Blobs with fewer grid points are ignored
+
+        Returns
+        -------
+        xarray.Dataset
+            One entry along dimension "blob" for each detected blob, with its
+            "track" id and time as coordinates and the center of mass "x" and
+            "y", the velocities "vx" and "vy" along the track, the "area", the
+            "amplitude" (maximum), the "mass" (integral above threshold) and the
+            "size" (number of grid points). Use e.g. result.groupby("track").
+        """
+        return track_blobs(self.data, threshold, x, y, time, max_distance, min_size)
@@ -1,12 +1,19 @@
 import warnings
-from matplotlib.animation import PillowWriter
 import matplotlib.pyplot as plt
 import xarray as xr
 from functools import partial
 from pprint import pformat as prettyformat
 import animatplot as amp
 import numpy as np
-from .plotting import _add_controls
+from .plotting import _add_controls, _select_frames, _mappable, _Image
+from .export import save_animation, save_parallel
+from .params import parameters
+from .interpolate import interpolate, _dg_orders
+from .probes import probes
+from .profiles import radial_profiles, radial_flux
+from .conditional import conditional_average
+from .derived import DerivedFields
+from .instrument import instrumented
 
 
 # A mechanism to extend the xarray.Dataset class by registering a custom property
@@ -32,6 +39,111 @@ class FeltorDatasetAccessor:
 
     def __init__(self, ds):
         self.data = ds
+        self._derived = None
+
+    @property
+    def params(self):
+        """The parameters of the FELTOR input file as read-only FeltorParameters.
+
+        The "inputfile" attribute is parsed once per unique string, e.g.
+
+        ds.feltor.params.Nx
+        ds.feltor.params["maxout"]
+        ds.feltor.params.dx       # derived quantities are memoized
+        """
+        if "inputfile" not in self.data.attrs:
+            raise AttributeError("The dataset has no inputfile attribute")
+        return parameters(self.data.attrs["inputfile"])
+
+    @property
+    def derived(self):
+        """Lazily computed fields derived from the variables, e.g. the E x B
+        velocity ds.feltor.derived["vExB_x"], memoized for this dataset. See
+        xfeltor.derived.DerivedFields."""
+        if self._derived is None:
+            self._derived = DerivedFields(self.data)
+        return self._derived
+
+    def interpolate(self, n=None, **coords):
+        """Interpolates the data to new coordinates using the discontinuous Galerkin
+        structure of the FELTOR grid.
+
+        In every cell the n values at the Gauss-Legendre nodes define a polynomial
+        of degree n-1, which is evaluated at the new coordinates. This is exact for
+        the data as represented in FELTOR, unlike linear interpolation of the
+        points. The interpolation weights are computed once and cached; the
+        interpolation runs chunk by chunk with dask, e.g.
+
+        ds.feltor.interpolate(x=np.linspace(0, 10, 100), y=5.0)  # a new grid
+        ds.feltor.interpolate(                                    # probes
+            x=xr.DataArray([1.0, 2.0], dims="probe"),
+            y=xr.DataArray([3.0, 3.0], dims="probe"),
+        )
+
+        Parameters
+        ----------
+        n : int or dict, optional
+            Number of polynomial coefficients per cell, or a dict with one value per
+            dimension. By default n_out or n of the input parameters.
+        coords : optional
+            New coordinates by dimension name, like in xarray.Dataset.interp.
+            Coordinates without common dimensions interpolate to a new grid.
+            Coordinates which are DataArrays with the same dimensions interpolate
+            to the individual points.
+
+        Returns
+        -------
+        xarray.Dataset
+            Points outside the grid are NaN
+        """
+        return interpolate(self.data, n, coords)
+
+    def probes(
+        self,
+        positions,
+        variables=None,
+        method="nearest",
+        n=None,
+        dim="probe",
+        save_as=None,
+        load=True,
+    ):
+        """Extracts the time series of many virtual probes in one pass.
+
+        All probes of all variables are selected with vectorized indexing, so that
+        every chunk of the data is read only once, instead of once per probe as in
+        a loop over ds["electrons"].sel(x=..., y=...), e.g.
+
+        ds.feltor.probes({"x": [10, 20, 30], "y": [50, 50, 50]}, ["electrons"])
+
+        Parameters
+        ----------
+        positions : dict or xarray.Dataset
+            Coordinates of the probes by dimension name, each a sequence with one
+            value per probe, or DataArrays along dim
+        variables : list of str, optional
+            Names of the variables to extract, by default all with the dimensions
+            of positions
+        method : str, optional
+            "nearest" takes the values at the nearest grid points, "dg"
+            interpolates with the dG polynomials, see interpolate()
+        n : int or dict, optional
+            Number of polynomial coefficients per cell for method="dg"
+        dim : str, optional
+            Name of the probe dimension
+        save_as : str, optional
+            Write the probe data to this netCDF file while it is computed, and
+            return the dataset opened from the file
+        load : bool, optional
+            If True, compute the probe data, otherwise return it lazily
+
+        Returns
+        -------
+        xarray.Dataset
+            Variables with dimensions (dim, time) and the probe positions as
+            coordinates along dim
+        """
+        return probes(self.data, positions, variables, method, n, dim, save_as, load)
 
     # What is the advantage over simply using print(ds) ?
     def __str__(self):
@@ -51,6 +163,147 @@ class FeltorDatasetAccessor:
         styled = partial(prettyformat, indent=4, compact=False)
         return "<xfeltor.FeltorDataset>" + "\n{}\n".format(styled(ds))
 
+    def radial_profiles(self, variables, radial="x", average_over=None, load=True):
+        """Computes mean radial profiles and fluctuation levels in one pass.
+
+        The mean <n> and the standard deviation sqrt(<n^2> - <n>^2) of each
+        variable are reduced chunk by chunk from the same reads, without forming
+        the fluctuations n - <n> as full-size arrays.
+
+        Parameters
+        ----------
+        variables : str or list of str
+            Names of the variables, e.g. ["electrons", "potential"]
+        radial : str, optional
+            The radial dimension, which is kept
+        average_over : str or list of str, optional
+            Dimensions to average over, by default all dimensions of each variable
+            except radial, e.g. time and the poloidal dimension
+        load : bool, optional
+            If True, compute the result, otherwise return it lazily
+
+        Returns
+        -------
+        xarray.Dataset
+            The mean profile of each variable under its name and the fluctuation
+            level as <name>_std
+        """
+        return radial_profiles(self.data, variables, radial, average_over, load)
+
+    def radial_flux(
+        self,
+        density="electrons",
+        potential="potential",
+        radial="x",
+        poloidal="y",
+        average_over=None,
+        n=None,
+        boundary="periodic",
+        load=True,
+    ):
+        """Computes the radial E x B particle flux <n v_E> in one pass.
+
+        The radial E x B velocity v_E = -d(potential)/d(poloidal) is computed
+        chunk by chunk with the derivative of the dG polynomials (see
+        xfeltor.derivatives.gradient) and directly reduced together with the
+        density, so that no full-size velocity or fluctuation arrays are kept.
+
+        Parameters
+        ----------
+        density : str, optional
+            Name of the density variable
+        potential : str, optional
+            Name of the electric potential
+        radial : str, optional
+            The radial dimension, which is kept
+        poloidal : str, optional
+            The dimension along which the potential is differentiated
+        average_over : str or list of str, optional
+            Dimensions to average over, by default all dimensions of the flux
+            except radial
+        n : int, optional
+            Number of polynomial coefficients per cell, by default n_out or n of
+            the input parameters, or 1 if these are unknown
+        boundary : str, optional
+            Boundary condition of the poloidal finite differences for n = 1,
+            "periodic" or "edge"
+        load : bool, optional
+            If True, compute the result, otherwise return it lazily
+
+        Returns
+        -------
+        xarray.Dataset
+            The total "flux" <n v_E>, the "fluctuation_flux" <n v_E> - <n><v_E>,
+            and the mean "density" and "velocity" profiles
+        """
+        if n is None:
+            try:
+                n = _dg_orders(self.data, None, [poloidal])[poloidal]
+            except ValueError:
+                n = 1
+        return radial_flux(
+            self.data,
+            density,
+            potential,
+            radial,
+            poloidal,
+            average_over,
+            n,
+            boundary,
+            load,
+        )
+
+    def conditional_average(
+        self,
+        reference,
+        threshold,
+        window,
+        variables=None,
+        overlap=False,
+        time="time",
+        load=True,
+    ):
+        """Conditionally averages fields around the peaks of a reference signal.
+
+        Events are the maxima of the intervals in which the reference, e.g. the
+        time series of a probe, exceeds threshold. The windows of all events are
+        gathered from the variables with one vectorized selection and averaged in
+        one computation, so every chunk is read once instead of once per event,
+        e.g.
+
+        probe = ds["electrons"].sel(x=50, y=50, method="nearest")
+        threshold = probe.mean() + 2.5 * probe.std()
+        ds.feltor.conditional_average(probe, threshold, window=20)
+
+        Parameters
+        ----------
+        reference : str or xarray.DataArray
+            Time series along time, or the name of such a variable in the dataset
+        threshold : float or 0d DataArray
+            Events are peaks above threshold
+        window : int
+            Number of time steps before and after each peak to average
+        variables : list of str, optional
+            Names of the variables to average, by default all along time
+        overlap : bool, optional
+            If False, of events closer than window only the largest is used
+        time : str, optional
+            The time dimension
+        load : bool, optional
+            If True, compute the result, otherwise return it lazily
+
+        Returns
+        -------
+        xarray.Dataset
+            The averages along the new dimension "lag" (time relative to the
+            peaks), the averaged "reference", and the "event_time" and
+            "event_amplitude" of all events along "event"
+        """
+        return conditional_average(
+            self.data, reference, variables, threshold, window, overlap, time, load
+        )
+
+    @instrumented("feltor.animate_list")
     def animate_list(
         self,
         variables,
@@ -63,6 +316,12 @@ class FeltorDatasetAccessor:
         tight_layout=True,
         controls="both",
         fps=100,
+        processes=None,
+        writer="pillow",
+        t_start=None,
+        t_end=None,
+        time_stride=None,
+        max_frames=None,
         **kwargs,
     ):
         """
@@ -82,7 +341,8 @@ class FeltorDatasetAccessor:
         show : bool, optional
             Call pyplot.show() to display the animation
         save_as : str, optional
-            If passed, a gif is created with this filename
+            If passed, a gif (or video, see writer) is created with this filename
+            and its size and timings are stored in anim.export_report
         tight_layout : bool or dict, optional
             If set to False, don't call tight_layout() on the figure.
             If a dict is passed, the dict entries are passed as arguments to
@@ -93,76 +353,162 @@ class FeltorDatasetAccessor:
             the play/pause toggle. If None or an empty string is passed, add neither.
         fps : float, optional
             Indicates the number of frames per second to play
+        processes : int, optional
+            If passed together with save_as, the frames are rendered in parallel by
+            this many processes (see xfeltor.export.save_parallel)
+        writer : str, optional
+            "pillow" saves a gif with Pillow. "mp4" and "webm" stream the frames into
+            ffmpeg and fall back to "pillow" if ffmpeg is not installed. "auto"
+            selects "mp4" if ffmpeg is installed and "pillow" otherwise.
+        t_start : float, optional
+            First time to animate. The frames are selected lazily, before any data
+            is loaded and before the color limits are computed.
+        t_end : float, optional
+            Last time to animate
+        time_stride : int, optional
+            Animate only every time_stride-th frame
+        max_frames : int, optional
+            Increase time_stride such that at most max_frames frames are animated
         **kwargs : dict, optional
             Additional keyword arguments are passed on to each animation function
         """
 
         if animate_over is None:
             animate_over = "time"
-        nvars = len(variables)
-
-        if nrows is None and ncols is None:
-            ncols = int(np.ceil(np.sqrt(nvars)))
-            nrows = int(np.ceil(nvars / ncols))
-        elif nrows is None:
-            nrows = int(np.ceil(nvars / ncols))
-        elif ncols is None:
-            ncols = int(np.ceil(nvars / nrows))
-        elif nrows * ncols < nvars:
-            raise ValueError("Not enough rows*columns to fit all variables")
 
-        fig, axes = plt.subplots(nrows, ncols, squeeze=False)
-        axes = axes.flatten()
+        selection = (t_start, t_end, time_stride, max_frames)
+        time = _select_frames(self.data["time"], "time", *selection)
+        variables = [_select_frames(v, "time", *selection) for v in variables]
+        if save_as is not None and processes is not None:
+            # The workers render the frames, so this process only reads the limits
+            # and the first frame of each variable
+            kwargs["lazy"] = True
 
-        ncells = nrows * ncols
+        anim = _animate_list(
+            time,
+            variables,
+            nrows=nrows,
+            ncols=ncols,
+            subplots_adjust=subplots_adjust,
+            tight_layout=tight_layout,
+            controls=controls,
+            fps=fps,
+            **kwargs,
+        )
 
-        if nvars < ncells:
-            for index in range(ncells - nvars):
-                fig.delaxes(axes[ncells - index - 1])
-
-        if subplots_adjust is not None:
-            fig.subplots_adjust(**subplots_adjust)
-
-        line_blocks = []
-        for v, ax in zip(variables, axes):
-            assert len(v.dims) in [
-                2,
-                3,
-            ], f"{v.name} variabel has neither 2 or 3 dimensions and can't be animated"
-
-            if len(v.dims) == 3:
-                line_blocks.append(
-                    v.T.feltor.animate2D(
-                        animate_over="time", animate=False, ax=ax, **kwargs
-                    )
+        if save_as is not None:
+            if processes is None:
+                anim.export_report = save_animation(anim, save_as, fps, writer)
+            else:
+                # Fix the limits of each variable, so that the workers do not have
+                # to scan the data again
+                build = partial(
+                    _animate_list,
+                    time,
+                    variables,
+                    nrows=nrows,
+                    ncols=ncols,
+                    subplots_adjust=subplots_adjust,
+                    tight_layout=tight_layout,
+                    controls=controls,
+                    fps=fps,
+                    limits=[_get_limits(block) for block in anim.blocks],
+                    **kwargs,
                 )
-            elif len(v.dims) == 2:
-                line_blocks.append(
-                    v.feltor.animate1D(
-                        animate_over="time", animate=False, ax=ax, **kwargs
-                    )
+                anim.export_report = save_parallel(
+                    build, len(anim.timeline), save_as, fps, processes, writer
                 )
 
-        timeline = amp.Timeline(self.data["time"], fps=fps)
-        anim = amp.Animation(line_blocks, timeline)
+        if show:
+            plt.show()
+
+        return anim
+
+
+def _get_limits(block):
+    """Return the color (or y axis) limits of an animatplot block as dict"""
+    if isinstance(block, _Image) or hasattr(block, "quad"):
+        norm = _mappable(block).norm
+        return {"vmin": norm.vmin, "vmax": norm.vmax}
+    vmin, vmax = block.ax.get_ylim()
+    return {"vmin": vmin, "vmax": vmax}
+
+
+def _animate_list(
+    time,
+    variables,
+    nrows=None,
+    ncols=None,
+    subplots_adjust=None,
+    tight_layout=True,
+    controls="both",
+    fps=100,
+    limits=None,
+    **kwargs,
+):
+    """Create the figure and animation of FeltorDatasetAccessor.animate_list
+
+    limits is an optional list with a dict of vmin and vmax for each variable.
+    """
+    nvars = len(variables)
+
+    if nrows is None and ncols is None:
+        ncols = int(np.ceil(np.sqrt(nvars)))
+        nrows = int(np.ceil(nvars / ncols))
+    elif nrows is None:
+        nrows = int(np.ceil(nvars / ncols))
+    elif ncols is None:
+        ncols = int(np.ceil(nvars / nrows))
+    elif nrows * ncols < nvars:
+        raise ValueError("Not enough rows*columns to fit all variables")
+
+    fig, axes = plt.subplots(nrows, ncols, squeeze=False)
+    axes = axes.flatten()
+
+    ncells = nrows * ncols
 
-        if tight_layout:
-            if subplots_adjust is not None:
-                warnings.warn(
-                    "tight_layout argument to animate_list() is True, but "
-                    "subplots_adjust argument is not None. subplots_adjust "
-                    "is being ignored."
+    if nvars < ncells:
+        for index in range(ncells - nvars):
+            fig.delaxes(axes[ncells - index - 1])
+
+    if subplots_adjust is not None:
+        fig.subplots_adjust(**subplots_adjust)
+
+    line_blocks = []
+    for i, (v, ax) in enumerate(zip(variables, axes)):
+        v_kwargs = kwargs if limits is None else dict(kwargs, **limits[i])
+        assert len(v.dims) in [
+            2,
+            3,
+        ], f"{v.name} variabel has neither 2 or 3 dimensions and can't be animated"
+
+        if len(v.dims) == 3:
+            line_blocks.append(
+                v.T.feltor.animate2D(
+                    animate_over="time", animate=False, ax=ax, **v_kwargs
                 )
-            if not isinstance(tight_layout, dict):
-                tight_layout = {}
-            fig.tight_layout(**tight_layout)
+            )
+        elif len(v.dims) == 2:
+            line_blocks.append(
+                v.feltor.animate1D(
+                    animate_over="time", animate=False, ax=ax, **v_kwargs
+                )
+            )
 
-        _add_controls(anim, controls, "time")
+    timeline = amp.Timeline(time, fps=fps)
+    anim = amp.Animation(line_blocks, timeline)
 
-        if save_as is not None:
-            anim.save(save_as + ".gif", writer=PillowWriter(fps=fps))
+    if tight_layout:
+        if subplots_adjust is not None:
+            warnings.warn(
+                "tight_layout argument to animate_list() is True, but "
+                "subplots_adjust argument is not None. subplots_adjust "
+                "is being ignored."
+            )
+        if not isinstance(tight_layout, dict):
+            tight_layout = {}
+        fig.tight_layout(**tight_layout)
 
-        if show:
-            plt.show()
+    _add_controls(anim, controls, "time")
 
-        return anim
+    return anim
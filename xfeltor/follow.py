@@ -0,0 +1,125 @@
+import time
+import xarray as xr
+import numpy as np
+import netCDF4
+from .load import _expand_paths, _trim_restart_overlap
+from .metadata import scan_file, dataset_from_metadata
+
+
+def _time_length(path, concat_dim):
+    """Return the number of time steps in a file, reading only its header"""
+    with netCDF4.Dataset(path) as nc:
+        if concat_dim not in nc.dimensions:
+            return 0
+        return len(nc.dimensions[concat_dim])
+
+
+class FeltorFollower:
+    """Follows the output of a running FELTOR simulation.
+
+    The dataset is opened like open_feltordataset and kept open. Each call of
+    update() checks the headers of the output files for newly appended time steps
+    (or new restart files) and appends only these to the dataset, without reading
+    the existing data again. Files are opened only for reading and closed right
+    after, so that no handle stays open on a file the simulation is writing.
+
+    This class can be used like:
+
+    follower = xfeltor.FeltorFollower("output.nc")
+    new = follower.update()       # dataset of the new frames, or None
+    follower.ds                   # the dataset including all frames so far
+    follower.follow(lambda new, ds: print(new.time.values), interval=60)
+
+    Note that HDF5 may refuse to open a file that another process has open for
+    writing; set the environment variable HDF5_USE_FILE_LOCKING=FALSE then.
+
+    Parameters
+    ----------
+    datapath : str or list of str, optional
+        Path to the data to follow, see open_feltordataset. A glob is expanded
+        again on each update, so that new restart files are found.
+    chunks : dict, optional
+        Chunk sizes, see open_feltordataset
+    concat_dim : str, optional
+        The name of the dimension along which output is appended
+    """
+
+    def __init__(self, datapath="./*.nc", chunks=None, concat_dim="time"):
+        self.datapath = datapath
+        self.chunks = {} if chunks is None else chunks
+        self.concat_dim = concat_dim
+        self._lengths = {}
+        self.ds = None
+        self.update()
+
+    def update(self):
+        """Append the time steps written since the last update to the dataset.
+
+        Time steps of the dataset at or after the first new time step are replaced
+        by the new ones, like open_feltordataset does for restarts.
+
+        Returns
+        -------
+        xarray.Dataset or None
+            The new frames only, None if there are none
+        """
+        try:
+            paths = _expand_paths(self.datapath)
+        except OSError:
+            # The simulation has not written any output yet
+            paths = []
+
+        parts = []
+        for path in paths:
+            known = self._lengths.get(path, 0)
+            if _time_length(path, self.concat_dim) <= known:
+                continue
+            meta = scan_file(path)
+            self._lengths[path] = meta.dims[self.concat_dim]
+            ds = dataset_from_metadata(meta, self.chunks, keep_open=False)
+            parts.append(ds.isel({self.concat_dim: slice(known, None)}))
+
+        parts = _trim_restart_overlap(parts, self.concat_dim)
+        if not parts:
+            return None
+        new = _combine(parts, self.concat_dim)
+
+        if self.ds is None:
+            self.ds = new
+        else:
+            start = new[self.concat_dim].values[0]
+            keep = int(np.searchsorted(self.ds[self.concat_dim].values, start))
+            old = self.ds.isel({self.concat_dim: slice(0, keep)})
+            self.ds = _combine([old, new], self.concat_dim)
+            new.attrs = dict(self.ds.attrs)
+        return new
+
+    def follow(self, callback, interval=10.0, timeout=None):
+        """Calls update() every interval seconds and callback(new, ds) whenever
+        there are new frames, where new holds the new frames only and ds is the
+        whole dataset.
+
+        Parameters
+        ----------
+        callback : callable
+            Called as callback(new, ds), e.g. to update a diagnostic with the new
+            frames only
+        interval : float, optional
+            Seconds to wait between updates
+        timeout : float, optional
+            Stop if no new frames arrived for this many seconds. By default follow
+            until interrupted.
+        """
+        last_change = time.monotonic()
+        while timeout is None or time.monotonic() - last_change < timeout:
+            new = self.update()
+            if new is not None:
+                last_change = time.monotonic()
+                callback(new, self.ds)
+            time.sleep(interval)
+
+
+def _combine(datasets, concat_dim):
+    return xr.combine_nested(
+        datasets, concat_dim=concat_dim, join="outer", combine_attrs="override"
+    )
@@ -0,0 +1,222 @@
+import os
+import sys
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from functools import wraps
+
+# Reports of the active profile() contexts
+_REPORTS = []
+
+# Stages entered but not yet left, per thread
+_OPEN = threading.local()
+
+
+def _bytes_read():
+    """Return the number of bytes this process has read so far, None if unknown.
+
+    This is rchar of /proc/self/io on Linux, which counts all reads from files
+    including the netCDF-C library's, whether or not they hit the page cache.
+    Reads in other processes, e.g. of a process pool, are not included.
+    """
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("rchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+@dataclass
+class Stage:
+    """Measurements of one stage.
+
+    Attributes
+    ----------
+    name : str
+        Name of the stage, e.g. "load.open" or "plotting.limits"
+    seconds : float
+        Wall time
+    bytes_read : int
+        Bytes read from files during the stage, None if unknown
+    peak_bytes : int
+        Peak of memory allocated during the stage above the memory allocated at
+        its start, None unless profile(memory=True)
+    depth : int
+        Number of enclosing stages
+    start : float
+        Start of the stage in seconds since the start of the profile
+    """
+
+    name: str
+    seconds: float
+    bytes_read: int = None
+    peak_bytes: int = None
+    depth: int = 0
+    start: float = 0.0
+
+
+class Report:
+    """The stages recorded in a profile() context, in the order they finished"""
+
+    def __init__(self, callback=None, memory=False):
+        self.callback = callback
+        self.memory = memory
+        self.stages = []
+        self._start = time.perf_counter()
+
+    def _add(self, stage):
+        self.stages.append(stage)
+        if self.callback is not None:
+            self.callback(asdict(stage))
+
+    def summary(self):
+        """Return the number of calls, total seconds and bytes read and the largest
+        peak memory of each stage by name"""
+        summary = {}
+        for stage in self.stages:
+            entry = summary.setdefault(
+                stage.name,
+                {"calls": 0, "seconds": 0.0, "bytes_read": None, "peak_bytes": None},
+            )
+            entry["calls"] += 1
+            entry["seconds"] += stage.seconds
+            if stage.bytes_read is not None:
+                entry["bytes_read"] = (entry["bytes_read"] or 0) + stage.bytes_read
+            if stage.peak_bytes is not None:
+                entry["peak_bytes"] = max(entry["peak_bytes"] or 0, stage.peak_bytes)
+        return summary
+
+    def to_dict(self):
+        """Return the stages as list of dicts, e.g. to store them as json"""
+        return [asdict(stage) for stage in self.stages]
+
+    def __str__(self):
+        lines = [
+            f"{'stage':<32}{'calls':>6}{'seconds':>10}{'MB read':>10}{'peak MB':>10}"
+        ]
+        for name, entry in self.summary().items():
+            read, peak = entry["bytes_read"], entry["peak_bytes"]
+            lines.append(
+                f"{name:<32}{entry['calls']:>6}{entry['seconds']:>10.3f}"
+                f"{'-' if read is None else f'{read / 1e6:.1f}':>10}"
+                f"{'-' if peak is None else f'{peak / 1e6:.1f}':>10}"
+            )
+        return "\n".join(lines)
+
+
+@contextmanager
+def profile(callback=None, memory=False):
+    """Record the wall time, bytes read and (optionally) peak memory of the stages
+    of loading, plotting and saving within this context, e.g.
+
+    with xfeltor.profile() as report:
+        ds = xfeltor.open_feltordataset("output.nc")
+        ds["electrons"].feltor.animate2D(save_as="electrons")
+    print(report)             # table of the stages
+    report.to_dict()          # list of the measurements of all stages
+
+    Parameters
+    ----------
+    callback : callable, optional
+        Called with a dict of the measurements of every stage when it finishes,
+        e.g. to push them into a monitoring system
+    memory : bool, optional
+        If True, also trace the peak memory of each stage with tracemalloc. This
+        slows down python code considerably.
+
+    Yields
+    ------
+    Report
+    """
+    report = Report(callback, memory)
+    started = memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    _REPORTS.append(report)
+    try:
+        yield report
+    finally:
+        _REPORTS.remove(report)
+        if started:
+            tracemalloc.stop()
+
+
+def _update_peaks(open_stages):
+    """Add the traced peak memory to all open stages and reset the peak"""
+    current, peak = tracemalloc.get_traced_memory()
+    for entry in open_stages:
+        entry["peak"] = max(entry["peak"], peak)
+    tracemalloc.reset_peak()
+    return current
+
+
+@contextmanager
+def stage(name):
+    """Record the stage name in all active profile() contexts. Does nothing if
+    there are none."""
+    if not _REPORTS:
+        yield
+        return
+    open_stages = _OPEN.__dict__.setdefault("stages", [])
+    tracing = tracemalloc.is_tracing()
+    entry = {"peak": 0, "current": 0}
+    if tracing:
+        entry["current"] = entry["peak"] = _update_peaks(open_stages)
+    open_stages.append(entry)
+    read = _bytes_read()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        if read is not None:
+            read = _bytes_read() - read
+        if tracing:
+            _update_peaks(open_stages)
+        open_stages.pop()
+        for report in list(_REPORTS):
+            report._add(
+                Stage(
+                    name,
+                    seconds,
+                    bytes_read=read,
+                    peak_bytes=(
+                        entry["peak"] - entry["current"]
+                        if tracing and report.memory
+                        else None
+                    ),
+                    depth=len(open_stages),
+                    start=start - report._start,
+                )
+            )
+
+
+def instrumented(name):
+    """Decorator recording every call of a function as stage name"""
+
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def _stacklevel():
+    """Return the stacklevel for warnings.warn in the calling function, such that
+    the warning points at the first caller outside of xfeltor"""
+    package = os.path.dirname(os.path.abspath(__file__))
+    frame = sys._getframe(1)
+    level = 1
+    while frame is not None and frame.f_code.co_filename.startswith(package):
+        frame = frame.f_back
+        level += 1
+    return level
@@ -0,0 +1,190 @@
+from functools import lru_cache
+import numpy as np
+import xarray as xr
+from .params import parameters
+
+
+def _gauss_legendre_nodes(n):
+    """Return the n Gauss-Legendre nodes in [-1, 1]"""
+    return np.polynomial.legendre.leggauss(n)[0]
+
+
+def dg_cells(nodes, n):
+    """Return the left boundary x0 and the width h of the cells of a dG coordinate.
+
+    FELTOR stores n values per cell at the Gauss-Legendre nodes of the cell.
+
+    Parameters
+    ----------
+    nodes : array
+        Values of the coordinate
+    n : int
+        Number of polynomial coefficients per cell
+    """
+    nodes = np.asarray(nodes, dtype=float)
+    if len(nodes) % n != 0:
+        raise ValueError(f"A dG coordinate of length {len(nodes)} cannot have n={n}")
+    xi = _gauss_legendre_nodes(n)
+    if len(nodes) > n:
+        h = nodes[n] - nodes[0]
+    elif n > 1:
+        h = 2 * (nodes[-1] - nodes[0]) / (xi[-1] - xi[0])
+    else:
+        raise ValueError("Cannot determine the cell width of a single cell with n=1")
+    x0 = nodes[0] - h * (1 + xi[0]) / 2
+    cells = len(nodes) // n
+    expected = x0 + h * (np.arange(cells)[:, None] + (1 + xi[None, :]) / 2)
+    if not np.allclose(nodes, expected.ravel(), rtol=0, atol=1e-6 * abs(h)):
+        raise ValueError(
+            f"The coordinate values are not the Gauss-Legendre nodes of a dG grid with "
+            f"n={n}"
+        )
+    return x0, h
+
+
+@lru_cache(maxsize=64)
+def _stencil(nodes, targets, n):
+    """Return the indices and weights of the dG interpolation from nodes to targets.
+
+    The value at targets[i] is sum_k values[index[i, k]] * weight[i, k], where the
+    n values of the cell containing targets[i] define a polynomial of degree n-1.
+    Weights of targets outside the grid are NaN. nodes and targets are tuples, so
+    that the result can be cached.
+    """
+    nodes = np.asarray(nodes)
+    targets = np.asarray(targets, dtype=float)
+    x0, h = dg_cells(nodes, n)
+    cells = len(nodes) // n
+
+    position = (targets - x0) / h
+    cell = np.clip(np.floor(position).astype(int), 0, cells - 1)
+    local = 2 * (position - cell) - 1
+
+    # Lagrange polynomials through the Gauss-Legendre nodes
+    xi = _gauss_legendre_nodes(n)
+    weight = np.ones((len(targets), n))
+    for k in range(n):
+        for m in range(n):
+            if m != k:
+                weight[:, k] *= (local - xi[m]) / (xi[k] - xi[m])
+    weight[(position < 0) | (position > cells)] = np.nan
+    index = cell[:, None] * n + np.arange(n)[None, :]
+    return index, weight
+
+
+def _interpolate_values(values, stencils, shape):
+    """Interpolate the last len(stencils) axes of values with the (index, weight)
+    stencils, which all have the same number of target points. The target points
+    are reshaped to shape."""
+    k = len(stencils)
+    index = []
+    weight = 1
+    for axis, (idx, w) in enumerate(stencils):
+        # Target point in the first axis, stencil of dimension axis in axis + 1
+        expand = (slice(None),) + tuple(
+            slice(None) if i == axis else None for i in range(k)
+        )
+        index.append(idx[expand])
+        weight = weight * w[expand]
+    gathered = values[(Ellipsis, *index)]
+    result = (gathered * weight).sum(axis=tuple(range(-k, 0)))
+    return result.reshape(values.shape[:-k] + shape)
+
+
+def _as_target(dim, value):
+    """Return the target points of dim as DataArray"""
+    if isinstance(value, xr.DataArray):
+        return value
+    value = np.asarray(value, dtype=float)
+    if value.ndim == 0:
+        return xr.DataArray(value)
+    return xr.DataArray(value, dims=[dim], coords={dim: value})
+
+
+def _interpolate_variable(da, targets, n):
+    """Interpolate one DataArray jointly in the dimensions of targets, which all
+    have the same dims"""
+    dims = [dim for dim in targets if dim in da.dims]
+    if not dims:
+        return da
+    target_dims = next(iter(targets.values())).dims
+    shape = next(iter(targets.values())).shape
+    stencils = [
+        _stencil(
+            tuple(da[dim].values.tolist()),
+            tuple(targets[dim].values.ravel().tolist()),
+            n[dim],
+        )
+        for dim in dims
+    ]
+    result = xr.apply_ufunc(
+        _interpolate_values,
+        da,
+        kwargs={"stencils": stencils, "shape": shape},
+        input_core_dims=[dims],
+        output_core_dims=[list(target_dims)],
+        exclude_dims=set(dims),
+        dask="parallelized",
+        output_dtypes=[np.result_type(da.dtype, float)],
+        dask_gufunc_kwargs={
+            "output_sizes": dict(zip(target_dims, shape)),
+            "allow_rechunk": True,
+        },
+        keep_attrs=True,
+    )
+    # Put the new dimensions where the interpolated ones were
+    first = min(da.dims.index(dim) for dim in dims)
+    order = [dim for dim in da.dims[:first] if dim not in dims]
+    order += list(target_dims)
+    order += [dim for dim in da.dims[first:] if dim not in dims]
+    return result.transpose(*order)
+
+
+def _dg_orders(ds, n, dims):
+    """Return the number of coefficients of each of dims, by default n_out or n of
+    the input parameters of ds"""
+    if n is None:
+        if "inputfile" in ds.attrs:
+            params = parameters(ds.attrs["inputfile"])
+            n = params.find("n_out") or params.find("n")
+        if n is None:
+            raise ValueError("n is unknown, pass the number of coefficients n")
+    if not isinstance(n, dict):
+        n = {dim: n for dim in dims}
+    return n
+
+
+def interpolate(ds, n, coords):
+    """Interpolate ds on the dG grid to new coordinates, see
+    FeltorDatasetAccessor.interpolate"""
+    n = _dg_orders(ds, n, coords)
+    targets = {dim: _as_target(dim, value) for dim, value in coords.items()}
+    for dim in targets:
+        if dim not in ds.dims:
+            raise ValueError(
+                f"Cannot interpolate along {dim}, which is not a dimension"
+            )
+
+    target_dims = {target.dims for target in targets.values()}
+    if len(target_dims) == 1 and len(targets) > 1 and next(iter(target_dims)):
+        # Points given along a common dimension, e.g. positions of probes
+        groups = [targets]
+    elif all(
+        not set(a.dims) & set(b.dims)
+        for i, a in enumerate(targets.values())
+        for b in list(targets.values())[i + 1 :]
+    ):
+        # Independent coordinates interpolate one dimension after the other
+        groups = [{dim: target} for dim, target in targets.items()]
+    else:
+        raise ValueError(
+            "The new coordinates must either all have the same dimensions or no "
+            "common dimension"
+        )
+
+    for group in groups:
+        ds = ds.map(_interpolate_variable, targets=group, n=n)
+        for dim, target in group.items():
+            ds = ds.drop_vars(dim, errors="ignore")
+            ds = ds.assign_coords({**target.coords, dim: target.variable})
+    return ds
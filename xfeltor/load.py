@@ -1,63 +1,256 @@
 import xarray as xr
 import numpy as np
 from typing import Union
-import json
+import os
+from functools import partial
+from glob import glob
+from natsort import natsorted
+from .metadata import scan_file, scan_files, dataset_from_metadata
+from .params import parameters
+from .instrument import instrumented, stage
+from .chunks import CHUNK_MODES, auto_chunks, metadata_variables, dataset_variables
 
 
+@instrumented("open_feltordataset")
 def open_feltordataset(
     datapath: str = "./*.nc",
-    chunks: Union[int, dict] = None,
+    chunks: Union[int, dict, str] = None,
     restart_indices: bool = False,
     concat_dim: str = "time",
+    parallel: Union[bool, int] = False,
+    cache: Union[bool, str] = False,
+    variables: list = None,
+    isel: dict = None,
+    sel: dict = None,
     **kwargs: dict,
 ) -> xr.Dataset:
     """Loads FELTOR output into one xarray Dataset. Can load either a single
     output file or multiple coherent files for restarted simulations.
 
-    if "inputfile" is present as an attribute, it is read as a json string and stored
-            as attributes of the xarray Dataset
+    if "inputfile" is present as an attribute, its parameters are available as
+    ds.feltor.params
     Parameters
     ----------
-    datapath : str or (list or tuple of xr.Dataset), optional
-        Path to the data to open. Can point to either a set of one or more *nc
-        files.
-    chunks : dict, optional
+    datapath : str or list of str, optional
+        Path to the data to open. Can be a glob pattern matching one or more *nc
+        files, a list of file names or a Zarr store written by
+        xfeltor.convert_to_zarr.
+    chunks : dict or str, optional
         Dictionary with keys given by dimension names and values given by chunk sizes.
         By default, chunks will be chosen to load entire input files into memory at once.
         This has a major impact on performance: please see the full documentation for more details:
         http://xarray.pydata.org/en/stable/user-guide/dask.html#chunking-and-performance
+        Alternatively, the chunk sizes are chosen automatically from the on-disk
+        chunking, the variable shapes and a budget per chunk (dask's
+        "array.chunk-size", limited by the available memory) for an access
+        pattern: "frames" gives chunks of complete time steps for animations and
+        spatial diagnostics, "timeseries" gives chunks of the complete time series
+        of small spatial tiles for analysis at single points.
     restart_indices: bool, optional
-        if True, duplicate time steps from restared runs are kept
+        if True, duplicate time steps from restared runs are kept. Otherwise the
+        files are ordered by their first time step and each file is cut before the
+        first time step of the following restart, i.e. the last written value of
+        a time step is kept. Since each file contributes a contiguous slice, the
+        chunks of the returned dataset align with the files.
     concat_dim : str, optional
         The name of the dimension along which to concatenate
+    parallel : bool or int, optional
+        If True, first read the metadata (dimensions, coordinates, variables and
+        attributes) of all files in a pool of processes, one per CPU, or as many
+        as the given int. The dataset is then built lazily from this metadata
+        without opening the files again; data is read only when it is computed.
+    cache : bool or str, optional
+        If True or the name of a json file, keep the metadata of each file (time
+        steps, variable shapes and chunking, attributes and parsed input
+        parameters) in this sidecar file, by default ".xfeltor_cache.json" in the
+        directory of the first file. Reopening an unchanged run then does not read
+        the files at all; only files whose size or modification time changed are
+        scanned again. Implies that the dataset is built from the metadata as with
+        parallel.
+    variables : list of str, optional
+        Names of the data variables to open. All other variables are dropped
+        when each file is opened, before the files are combined, so that they
+        are neither decoded nor concatenated.
+    isel : dict, optional
+        Indices to select along spatial dimensions, e.g. {"y": 100} or
+        {"x": slice(0, 50)}, applied to each file before the files are combined
+    sel : dict, optional
+        Like isel, but selecting by coordinate labels
     kwargs : optional
-        Keyword arguments are passed down to `xarray.open_mfdataset`, which in
-        turn passes extra kwargs down to `xarray.open_dataset`.
+        Keyword arguments are passed down to `xarray.open_dataset` for each file
+        if neither parallel nor cache is used.
     """
     if chunks is None:
         chunks = {}
 
-    ds = xr.open_mfdataset(
-        datapath,
-        chunks=chunks,
-        combine="nested",
-        concat_dim=concat_dim,
-        decode_times=False,
-        join="outer",
-        **kwargs,
+    if isinstance(datapath, (str, os.PathLike)) and _is_zarr_store(datapath):
+        # Stores written by xfeltor.convert_to_zarr contain the combined run.
+        # These are written without consolidated metadata in Zarr v3
+        if os.path.exists(os.path.join(datapath, "zarr.json")):
+            kwargs.setdefault("consolidated", False)
+        mode = chunks if chunks in CHUNK_MODES else None
+        ds = xr.open_zarr(
+            datapath, chunks={} if mode else chunks, decode_times=False, **kwargs
+        )
+        ds = _subset(ds, variables, isel, sel, concat_dim)
+        if mode:
+            ds = ds.chunk(auto_chunks(dataset_variables(ds), mode, concat_dim))
+    else:
+        ds = _open_netcdf_files(
+            datapath,
+            chunks,
+            restart_indices,
+            concat_dim,
+            parallel,
+            cache,
+            variables,
+            isel,
+            sel,
+            **kwargs,
+        )
+    return ds
+
+
+def _open_netcdf_files(
+    datapath,
+    chunks,
+    restart_indices,
+    concat_dim,
+    parallel,
+    cache,
+    variables,
+    isel,
+    sel,
+    **kwargs,
+):
+    """Open and combine the netCDF files of open_feltordataset. The variables and
+    the spatial region are selected in each file before combining them.
+
+    Returns the combined dataset.
+    """
+    paths = _expand_paths(datapath)
+    if parallel or cache:
+        if cache is True:
+            cache = os.path.join(os.path.dirname(paths[0]), ".xfeltor_cache.json")
+        with stage("load.scan"):
+            metas = scan_files(paths, parallel, cache or None)
+        chunks = _resolve_chunks(chunks, metas[0], concat_dim, variables)
+        opened = [dataset_from_metadata(meta, chunks, variables) for meta in metas]
+        for meta in metas:
+            if meta.params is not None:
+                # Avoid parsing the inputfile again for ds.feltor.params
+                parameters(meta.attrs["inputfile"], meta.params)
+    else:
+        if chunks in CHUNK_MODES or variables is not None:
+            # The header of the first file tells which variables to drop
+            first = scan_file(paths[0])
+            chunks = _resolve_chunks(chunks, first, concat_dim, variables)
+            if variables is not None:
+                kwargs.setdefault(
+                    "drop_variables",
+                    [
+                        name
+                        for name in first.variables
+                        if name not in variables and name not in first.coords
+                    ],
+                )
+        with stage("load.open"):
+            opened = [
+                xr.open_dataset(path, chunks=chunks, decode_times=False, **kwargs)
+                for path in paths
+            ]
+
+    with stage("load.combine"):
+        datasets = [_subset(ds, variables, isel, sel, concat_dim) for ds in opened]
+        if not restart_indices:
+            datasets = _trim_restart_overlap(datasets, concat_dim)
+
+        ds = xr.combine_nested(
+            datasets,
+            concat_dim=concat_dim,
+            join="outer",
+            combine_attrs="override",
+        )
+    ds.set_close(partial(_close_all, opened))
+    return ds
+
+
+def _resolve_chunks(chunks, meta, concat_dim, variables=None):
+    """Return the chunks for an access pattern in CHUNK_MODES, chosen for the
+    variables of the file of meta, otherwise chunks as they are"""
+    if chunks in CHUNK_MODES:
+        return auto_chunks(metadata_variables(meta, variables), chunks, concat_dim)
+    return chunks
+
+
+def _subset(ds, variables=None, isel=None, sel=None, concat_dim="time"):
+    """Select the variables and the spatial region of one dataset"""
+    for indexers in [isel, sel]:
+        if indexers and concat_dim in indexers:
+            raise ValueError(
+                f"Selecting along {concat_dim} is not possible for single files, "
+                "select the time steps of the returned dataset instead"
+            )
+    if variables is not None:
+        ds = ds[list(variables)]
+    if isel:
+        ds = ds.isel(isel)
+    if sel:
+        ds = ds.sel(sel)
+    return ds
+
+
+def _is_zarr_store(path):
+    """Return True if path is a directory containing a Zarr (v2 or v3) store"""
+    return any(
+        os.path.exists(os.path.join(path, name))
+        for name in ["zarr.json", ".zgroup", ".zmetadata"]
     )
 
-    # store inputfile data in ds.attrs
-    if "inputfile" in ds.attrs:
-        input_variables = json.loads(ds.attrs["inputfile"])
 
-        for i in input_variables:
-            ds.attrs[i] = input_variables[i]
+def _expand_paths(datapath):
+    """Return the naturally sorted list of files matching datapath, such that
+    e.g. run_2.nc comes before run_10.nc"""
+    if isinstance(datapath, (str, os.PathLike)):
+        paths = natsorted(glob(os.fspath(datapath)))
+    else:
+        paths = [os.fspath(path) for path in datapath]
+    if not paths:
+        raise OSError(f"no files to open matching {datapath}")
+    return paths
+
+
+def _restart_slices(times):
+    """Return for the time coordinates of consecutive files the slice of each file
+    that is not written again by a later file (last write wins).
 
-    if restart_indices:
-        return ds
+    Every file is cut before the first time step of any later file, so that each
+    file contributes one contiguous slice.
+    """
+    slices = []
+    later_start = np.inf
+    for t in reversed(times):
+        slices.append(slice(0, int(np.searchsorted(t, later_start, side="left"))))
+        if len(t) > 0:
+            later_start = min(later_start, t[0])
+    return slices[::-1]
+
+
+def _trim_restart_overlap(datasets, concat_dim):
+    """Order the datasets of a restarted simulation by their first time step and
+    remove the time steps that are written again by a later restart"""
+    datasets = sorted(
+        (ds for ds in datasets if ds.sizes.get(concat_dim, 0) > 0),
+        key=lambda ds: ds[concat_dim].values[0],
+    )
+    slices = _restart_slices([ds[concat_dim].values for ds in datasets])
+    return [
+        ds.isel({concat_dim: index})
+        for ds, index in zip(datasets, slices)
+        if index.stop > 0
+    ]
 
-    _, index = np.unique(ds[concat_dim], return_index=True)
 
-    # return ds.isel(time=index)
-    return ds[{concat_dim: index}]
+def _close_all(datasets):
+    for ds in datasets:
+        ds.close()
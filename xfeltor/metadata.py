@@ -0,0 +1,321 @@
+import os
+import json
+import warnings
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+import numpy as np
+import xarray as xr
+from xarray.backends import CachingFileManager
+from xarray.backends.locks import HDF5_LOCK, NETCDFC_LOCK, combine_locks
+import dask.array
+from dask.base import tokenize
+import netCDF4
+from .instrument import _stacklevel
+
+# The netCDF-C library is not thread-safe, so all reads go through the same lock
+# that xarray uses for reading with netCDF4, also for datasets opened by xarray
+_NETCDF_LOCK = combine_locks([NETCDFC_LOCK, HDF5_LOCK])
+
+# Attributes used for decoding the data, which are not copied to the variables
+_ENCODING_ATTRS = ["_FillValue", "missing_value", "scale_factor", "add_offset"]
+
+
+def _to_python(value):
+    """Convert numpy attribute values to python types that can be stored as json"""
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    return value
+
+
+@dataclass
+class FileMetadata:
+    """Metadata of one FELTOR output file, read without loading any data variable.
+
+    Attributes
+    ----------
+    path : str
+        Name of the file
+    size : int
+        Size of the file in bytes when it was scanned
+    mtime : int
+        Modification time of the file in ns when it was scanned
+    dims : dict
+        Length of each dimension
+    variables : dict
+        For each variable a dict with its "dims", "dtype", on-disk "chunking" (None
+        for contiguous variables), decoding "encoding" and "attrs"
+    coords : dict
+        Values of each one-dimensional dimension coordinate, e.g. time, x and y
+    attrs : dict
+        Global attributes, including the "inputfile" string
+    params : dict
+        The parsed "inputfile" attribute, None if there is none
+    """
+
+    path: str
+    size: int = 0
+    mtime: int = 0
+    dims: dict = field(default_factory=dict)
+    variables: dict = field(default_factory=dict)
+    coords: dict = field(default_factory=dict)
+    attrs: dict = field(default_factory=dict)
+    params: dict = None
+
+    def is_current(self):
+        """Return True if the file has not changed since it was scanned"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return (stat.st_size, stat.st_mtime_ns) == (self.size, self.mtime)
+
+    def times(self, concat_dim="time"):
+        """Return the values of the concat_dim coordinate as numpy array"""
+        return np.asarray(self.coords.get(concat_dim, []))
+
+    def shape(self, name):
+        """Return the shape of variable name"""
+        return tuple(self.dims[dim] for dim in self.variables[name]["dims"])
+
+
+def scan_file(path):
+    """Read the metadata of one FELTOR output file.
+
+    Only the header and the one-dimensional dimension coordinates are read.
+    """
+    stat = os.stat(path)
+    with netCDF4.Dataset(path) as nc:
+        nc.set_auto_maskandscale(False)
+        meta = FileMetadata(
+            path=os.fspath(path), size=stat.st_size, mtime=stat.st_mtime_ns
+        )
+        meta.dims = {name: len(dim) for name, dim in nc.dimensions.items()}
+        meta.attrs = {name: _to_python(nc.getncattr(name)) for name in nc.ncattrs()}
+        if "inputfile" in meta.attrs:
+            meta.params = json.loads(meta.attrs["inputfile"])
+        for name, var in nc.variables.items():
+            attrs = {key: _to_python(var.getncattr(key)) for key in var.ncattrs()}
+            chunking = var.chunking()
+            meta.variables[name] = {
+                "dims": list(var.dimensions),
+                "dtype": _decoded_dtype(var.dtype, attrs).str,
+                "chunking": None if chunking == "contiguous" else list(chunking),
+                "encoding": {k: attrs.pop(k) for k in _ENCODING_ATTRS if k in attrs},
+                "attrs": attrs,
+            }
+            if var.dimensions == (name,):
+                meta.coords[name] = _decode(var[:], meta.variables[name]).tolist()
+    return meta
+
+
+def scan_files(paths, parallel=False, cache=None):
+    """Read the metadata of many FELTOR output files.
+
+    Parameters
+    ----------
+    paths : list of str
+    parallel : bool or int, optional
+        If True, read the files in a pool of processes with one process per CPU. An
+        int gives the number of processes.
+    cache : str, optional
+        Name of a json file which stores the metadata of each file together with
+        its size and modification time. Only files that are not in the cache or
+        have changed since are read, and the cache is updated afterwards.
+
+    Returns
+    -------
+    list of FileMetadata
+        In the same order as paths
+    """
+    cached = {} if cache is None else _read_cache(cache)
+    metas = {}
+    for path in paths:
+        meta = cached.get(os.path.abspath(path))
+        if meta is not None and meta.is_current():
+            meta.path = os.fspath(path)
+            metas[path] = meta
+    stale = [path for path in paths if path not in metas]
+
+    if not parallel or len(stale) < 2:
+        metas.update((path, scan_file(path)) for path in stale)
+    else:
+        processes = os.cpu_count() if parallel is True else int(parallel)
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            min(processes, len(stale)), mp_context=context
+        ) as pool:
+            metas.update(zip(stale, pool.map(scan_file, stale)))
+
+    if cache is not None and stale:
+        cached.update((os.path.abspath(path), metas[path]) for path in stale)
+        _write_cache(cache, cached)
+    return [metas[path] for path in paths]
+
+
+# Increase when the format of FileMetadata changes to invalidate old caches
+_CACHE_VERSION = 1
+
+
+def _read_cache(cache):
+    """Return the FileMetadata stored in the json file cache by absolute path"""
+    try:
+        with open(cache) as f:
+            content = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if content.get("version") != _CACHE_VERSION:
+        return {}
+    return {
+        path: FileMetadata(**meta) for path, meta in content.get("files", {}).items()
+    }
+
+
+def _write_cache(cache, metas):
+    """Write the FileMetadata to the json file cache, replacing it atomically"""
+    content = {
+        "version": _CACHE_VERSION,
+        "files": {path: asdict(meta) for path, meta in metas.items()},
+    }
+    tmp = f"{cache}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w") as f:
+            json.dump(content, f)
+        os.replace(tmp, cache)
+    except OSError as error:
+        warnings.warn(
+            f"Could not write metadata cache {cache}: {error}",
+            stacklevel=_stacklevel(),
+        )
+
+
+def _decoded_dtype(dtype, attrs):
+    """Return the dtype of a variable after decoding"""
+    if "scale_factor" in attrs or "add_offset" in attrs:
+        return np.dtype("float64")
+    if np.issubdtype(dtype, np.integer) and (
+        "_FillValue" in attrs or "missing_value" in attrs
+    ):
+        return np.dtype("float64")
+    return np.dtype(dtype)
+
+
+def _decode(values, variable):
+    """Mask fill values and apply scale and offset like xarray's CF decoding"""
+    encoding = variable["encoding"]
+    values = np.asarray(values).astype(variable["dtype"], copy=False)
+    for key in ["_FillValue", "missing_value"]:
+        if key in encoding and np.issubdtype(values.dtype, np.floating):
+            values = np.where(values == encoding[key], np.nan, values)
+    if "scale_factor" in encoding:
+        values = values * encoding["scale_factor"]
+    if "add_offset" in encoding:
+        values = values + encoding["add_offset"]
+    return values
+
+
+class _TransientFile:
+    """File manager which opens the file for every read and closes it right after,
+    so that no handle stays open on a file that is still being written"""
+
+    def __init__(self, path):
+        self.path = path
+
+    @contextmanager
+    def acquire_context(self, needs_lock=True):
+        nc = netCDF4.Dataset(self.path)
+        try:
+            yield nc
+        finally:
+            nc.close()
+
+    def close(self):
+        pass
+
+
+class _NetCDFVariable:
+    """Array-like view of a variable in a netCDF file, which is read on indexing.
+
+    Used with dask.array.from_array to create the dask arrays of a dataset from its
+    FileMetadata, without opening the file until data is actually needed.
+    """
+
+    def __init__(self, manager, name, shape, variable):
+        self.manager = manager
+        self.name = name
+        self.shape = shape
+        self.variable = variable
+        self.dtype = np.dtype(variable["dtype"])
+        self.ndim = len(shape)
+
+    def __getitem__(self, key):
+        # dask.array.from_array holds _NETCDF_LOCK while calling this
+        with self.manager.acquire_context() as nc:
+            nc.set_auto_maskandscale(False)
+            return _decode(nc.variables[self.name][key], self.variable)
+
+
+def _variable_chunks(meta, name, chunks):
+    """Return the dask chunks of variable name for the chunks argument of
+    open_feltordataset, like xarray: an int is the size for all dimensions, a dict
+    gives the size for some dimensions and the other dimensions keep the on-disk
+    chunk size. "auto" (for all or single dimensions) lets dask choose multiples
+    of the on-disk chunks."""
+    variable = meta.variables[name]
+    shape = meta.shape(name)
+    on_disk = variable["chunking"] or shape
+    if isinstance(chunks, str) and chunks != "auto":
+        raise ValueError(f"Unrecognised value for chunks={chunks}")
+    sizes = []
+    for dim, disk_size in zip(variable["dims"], on_disk):
+        if isinstance(chunks, dict):
+            size = chunks.get(dim, disk_size)
+        else:
+            size = chunks
+        sizes.append(meta.dims[dim] if size in [None, -1] else size)
+    if "auto" in sizes:
+        return dask.array.core.normalize_chunks(
+            tuple(sizes),
+            shape,
+            dtype=np.dtype(variable["dtype"]),
+            previous_chunks=tuple(on_disk),
+        )
+    return tuple(sizes)
+
+
+def dataset_from_metadata(meta, chunks=None, variables=None, keep_open=True):
+    """Create a lazy xarray Dataset of one file from its FileMetadata.
+
+    The coordinates are taken from the metadata and the data variables are dask
+    arrays which read from the file only when they are computed. If variables is
+    given, only the data variables with these names are created. If keep_open is
+    False, the file is opened for each read and closed again afterwards.
+    """
+    if chunks is None:
+        chunks = {}
+    if keep_open:
+        # Shares the file handle between all variables and closes it when the
+        # dataset is closed or garbage collected
+        manager = CachingFileManager(netCDF4.Dataset, meta.path, mode="r")
+    else:
+        manager = _TransientFile(meta.path)
+    coords = {}
+    data_vars = {}
+    for name, variable in meta.variables.items():
+        if name in meta.coords:
+            coords[name] = (name, np.asarray(meta.coords[name]), variable["attrs"])
+            continue
+        if variables is not None and name not in variables:
+            continue
+        shape = meta.shape(name)
+        array = dask.array.from_array(
+            _NetCDFVariable(manager, name, shape, variable),
+            chunks=_variable_chunks(meta, name, chunks),
+            lock=_NETCDF_LOCK,
+            name=f"{name}-{tokenize(meta.path, name, meta.dims)}",
+        )
+        data_vars[name] = (variable["dims"], array, variable["attrs"])
+    ds = xr.Dataset(data_vars, coords, attrs=meta.attrs)
+    ds.set_close(manager.close)
+    return ds
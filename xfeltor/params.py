@@ -0,0 +1,162 @@
+import json
+from collections.abc import Mapping
+from functools import cached_property
+
+# Parameters of each unique inputfile string, so that every string is parsed once
+_PARAMETERS = {}
+
+
+def parameters(inputfile, parsed=None):
+    """Return the FeltorParameters of an inputfile string.
+
+    The string is parsed only the first time, later calls return the same object.
+
+    Parameters
+    ----------
+    inputfile : str
+        The json string stored in the "inputfile" attribute of FELTOR output
+    parsed : dict, optional
+        The already parsed string, e.g. from the metadata of a file
+    """
+    params = _PARAMETERS.get(inputfile)
+    if params is None:
+        if parsed is None:
+            parsed = json.loads(inputfile)
+        params = _PARAMETERS[inputfile] = FeltorParameters(parsed)
+    return params
+
+
+def _freeze(value):
+    """Wrap nested dicts as FeltorParameters and lists as tuples"""
+    if isinstance(value, dict):
+        return FeltorParameters(value)
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class FeltorParameters(Mapping):
+    """Read-only view of the parameters of a FELTOR input file.
+
+    Parameters can be accessed like a dict or as attributes, also for nested
+    sections:
+
+    params = ds.feltor.params
+    params["Nx"], params.Nx           # the same
+    params.grid.n                     # nested parameters of newer FELTOR versions
+    params.find("dt")                 # search all sections
+
+    Derived grid quantities (nx, ny, lx, ly, dx, dy, dt, output_dt) are computed
+    once and memoized.
+    """
+
+    def __init__(self, parsed):
+        object.__setattr__(self, "_parsed", parsed)
+        object.__setattr__(self, "_frozen", {})
+
+    def __getitem__(self, key):
+        frozen = self._frozen
+        if key not in frozen:
+            frozen[key] = _freeze(self._parsed[key])
+        return frozen[key]
+
+    def __iter__(self):
+        return iter(self._parsed)
+
+    def __len__(self):
+        return len(self._parsed)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(f"No FELTOR parameter {name}") from None
+
+    def __setattr__(self, name, value):
+        raise AttributeError("FELTOR parameters are read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError("FELTOR parameters are read-only")
+
+    def __dir__(self):
+        return list(super().__dir__()) + [k for k in self._parsed if k.isidentifier()]
+
+    def __repr__(self):
+        return f"FeltorParameters({self._parsed!r})"
+
+    def to_dict(self):
+        """Return the parameters as (a copy of the parsed) dict"""
+        return json.loads(json.dumps(self._parsed))
+
+    def find(self, name, default=None):
+        """Return the parameter name from the top level or, if it is not there, from
+        the first nested section containing it
+
+        Parameters
+        ----------
+        name : str
+        default : optional
+            Returned if no section contains name
+        """
+        if name in self._parsed:
+            return self[name]
+        for value in self.values():
+            if isinstance(value, FeltorParameters):
+                found = value.find(name, _MISSING)
+                if found is not _MISSING:
+                    return found
+        return default
+
+    def _require(self, name):
+        value = self.find(name, _MISSING)
+        if value is _MISSING:
+            raise AttributeError(f"No FELTOR parameter {name}")
+        return value
+
+    # cached_property stores the values in the instance __dict__ directly, which
+    # is not affected by __setattr__
+    @cached_property
+    def nx(self):
+        """Number of grid points in x, n*Nx"""
+        return self._require("n") * self._require("Nx")
+
+    @cached_property
+    def ny(self):
+        """Number of grid points in y, n*Ny"""
+        return self._require("n") * self._require("Ny")
+
+    @cached_property
+    def lx(self):
+        """Length of the box in x"""
+        return self._require("lx")
+
+    @cached_property
+    def ly(self):
+        """Length of the box in y"""
+        return self._require("ly")
+
+    @cached_property
+    def dx(self):
+        """Grid spacing in x, lx/(n*Nx)"""
+        return self.lx / self.nx
+
+    @cached_property
+    def dy(self):
+        """Grid spacing in y, ly/(n*Ny)"""
+        return self.ly / self.ny
+
+    @cached_property
+    def dt(self):
+        """Time step of the simulation"""
+        return self._require("dt")
+
+    @cached_property
+    def output_dt(self):
+        """Time between two outputs, dt times the number of steps between outputs
+        (itstp)"""
+        return self.dt * self._require("itstp")
+
+
+_MISSING = object()
@@ -1,9 +1,14 @@
 import matplotlib as mpl
 import matplotlib.pyplot as plt
+import copy
 import warnings
-from matplotlib.animation import PillowWriter
 import numpy as np
 import animatplot as amp
+import dask
+import dask.array
+from functools import partial
+from .export import save_animation, save_parallel
+from .instrument import instrumented, stage
 
 
 def _add_controls(anim, controls, t_label):
@@ -64,7 +69,171 @@ def _extracted_from__parse_coord_option_8(da, arg1):
     return c, label
 
 
+# Percentiles summarizing the distribution of each chunk for robust color limits
+_SKETCH = np.linspace(0.0, 100.0, 201)
+
+
+def _block_limits(block, percentiles):
+    """Reduce one block of data to [count, min, max, *percentiles]"""
+    block = np.asarray(block)
+    valid = block[np.isfinite(block)]
+    if valid.size == 0:
+        return np.full(3 + len(percentiles), np.nan)
+    stats = [valid.size, valid.min(), valid.max()]
+    if len(percentiles):
+        stats.extend(np.percentile(valid, percentiles))
+    return np.array(stats, dtype=float)
+
+
+def _merge_percentiles(stats, percentiles):
+    """Return the percentiles of the union of chunks, each given by its count and
+    its values at the percentiles _SKETCH as returned by _block_limits.
+
+    The distribution of each chunk is interpolated linearly between its sketch
+    values. The distributions are summed weighted by the counts, including the left
+    and right limits at repeated values, so that values shared by many points of a
+    chunk stay a step of the summed distribution.
+    """
+    counts, sketch = stats[:, 0], stats[:, 3:]
+    fractions = _SKETCH / 100
+    grid = np.unique(sketch)
+    left = np.zeros(len(grid))
+    right = np.zeros(len(grid))
+    for count, values in zip(counts, sketch):
+        # np.interp takes the last of repeated values, so reversing gives the first
+        left += count * np.interp(-grid, -values[::-1], fractions[::-1])
+        right += count * np.interp(grid, values, fractions)
+    cumulative = np.stack([left, right], axis=1).ravel() / counts.sum()
+    return np.interp(np.asarray(percentiles) / 100, cumulative, np.repeat(grid, 2))
+
+
+@instrumented("plotting.limits")
+def _find_limits(data, robust=False, percentiles=(2.0, 98.0)):
+    """Determine the color limits of data in a single pass over its chunks.
+
+    Each dask chunk is reduced independently to its minimum, maximum and (if robust
+    is set) a summary of its distribution, and only these few numbers are combined
+    at the end. Like this a dask-backed array is read exactly once, instead of once
+    for the minimum and once more for the maximum.
+
+    Parameters
+    ----------
+    data : xarray.DataArray, dask array or numpy array
+    robust : bool, optional
+        If True, return the given percentiles instead of the minimum and maximum.
+        For data consisting of several chunks each chunk is summarized by its
+        values at 201 equally spaced percentiles, so the global percentiles are
+        accurate to about half a percent of the values.
+    percentiles : tuple of float, optional
+        Lower and upper percentile used if robust is True
+
+    Returns
+    -------
+    vmin, vmax : float
+    """
+    values = getattr(data, "data", data)
+    chunked = isinstance(values, dask.array.Array)
+    if not robust:
+        summary = []
+    elif chunked:
+        summary = _SKETCH
+    else:
+        summary = list(percentiles)
+
+    if chunked:
+        blocks = values.to_delayed().ravel()
+        stats = dask.compute(
+            *[dask.delayed(_block_limits)(block, summary) for block in blocks]
+        )
+        stats = np.array(stats)
+    else:
+        stats = _block_limits(values, summary)[np.newaxis, :]
+
+    stats = stats[np.isfinite(stats[:, 0])]
+    if len(stats) == 0:
+        raise ValueError("Cannot determine color limits of data without finite values")
+
+    if robust:
+        if chunked:
+            vmin, vmax = _merge_percentiles(stats, percentiles)
+        else:
+            vmin, vmax = stats[0, 3:5]
+        return float(vmin), float(vmax)
+    return float(stats[:, 1].min()), float(stats[:, 2].max())
+
+
+def _select_frames(
+    data, animate_over, t_start=None, t_end=None, time_stride=None, max_frames=None
+):
+    """Lazily select the frames to animate from data.
+
+    The frames between t_start and t_end are selected by value, then every
+    time_stride-th of them. The stride is increased if necessary such that at most
+    max_frames frames remain.
+    """
+    if t_start is not None or t_end is not None:
+        data = data.sel({animate_over: slice(t_start, t_end)})
+    stride = 1 if time_stride is None else int(time_stride)
+    if stride < 1:
+        raise ValueError(f"time_stride must be at least 1, got {time_stride}")
+    if max_frames is not None:
+        if max_frames < 1:
+            raise ValueError(f"max_frames must be at least 1, got {max_frames}")
+        stride = max(stride, int(np.ceil(data.sizes[animate_over] / max_frames)))
+    if stride > 1:
+        data = data.isel({animate_over: slice(None, None, stride)})
+    return data
+
+
+def _downsample_factors(data, x, y, ax, downsample):
+    """Return the factors by which to coarsen the dimensions x and y of data"""
+    if downsample is None or downsample is False:
+        return {}
+    if downsample is True:
+        # Number of cells per pixel of the axes
+        bbox = ax.get_window_extent()
+        pixels = {x: bbox.width, y: bbox.height}
+        factors = {dim: int(data.sizes[dim] // max(pixels[dim], 1)) for dim in pixels}
+    elif isinstance(downsample, dict):
+        factors = downsample
+    else:
+        factors = {x: downsample, y: downsample}
+    return {dim: int(factor) for dim, factor in factors.items() if factor > 1}
+
+
+def _coarsen_extrema(values, axis):
+    """Reduce values along axis to their minimum or maximum, whichever deviates
+    more from the mean"""
+    vmin = values.min(axis=axis)
+    vmax = values.max(axis=axis)
+    mean = values.mean(axis=axis)
+    return np.where(vmax - mean >= mean - vmin, vmax, vmin)
+
+
+def _coarsen(data, factors, method="mean"):
+    """Coarsen data by block reduction. This is done chunk-wise on dask arrays"""
+    coarse = data.coarsen(factors, boundary="trim")
+    if method == "mean":
+        return coarse.mean()
+    elif method == "extrema":
+        return coarse.reduce(_coarsen_extrema)
+    raise ValueError(f"Unrecognised value for downsample_method={method}")
+
+
+def _coarsen_coord(values, factor):
+    """Coarsen 1d coordinate values like _coarsen with method 'mean'"""
+    values = np.asarray(values)
+    n = len(values) // factor * factor
+    return values[:n].reshape(-1, factor).mean(axis=1)
+
+
 def _create_norm(logscale, norm, vmin, vmax):
+    """Return the norm of the color scale. A norm that is passed is copied without
+    its callbacks, so that it stays independent of (and picklable without) the
+    figure it is used in."""
+    if norm is not None:
+        norm = copy.copy(norm)
+        norm.callbacks = mpl.cbook.CallbackRegistry(signals=["changed"])
     if logscale:
         if norm is not None:
             raise ValueError(
@@ -84,6 +253,112 @@ def _create_norm(logscale, norm, vmin, vmax):
     return norm
 
 
+class _FrameLoader:
+    """Loads the frames of a DataArray on demand.
+
+    Only a window of `prefetch` consecutive frames is kept in memory, so the memory
+    needed for an animation is independent of the number of time steps. The window
+    is read from the (dask-backed) DataArray the first time one of its frames is
+    requested.
+    """
+
+    def __init__(self, data, animate_over, prefetch=1):
+        self.data = data
+        self.animate_over = animate_over
+        self.prefetch = max(1, int(prefetch))
+        self._start = None
+        self._window = None
+
+    def __len__(self):
+        return self.data.sizes[self.animate_over]
+
+    def __getitem__(self, i):
+        i = range(len(self))[i]
+        if self._window is None or not 0 <= i - self._start < len(self._window):
+            window = slice(i, i + self.prefetch)
+            with stage("plotting.read"):
+                self._window = self.data.isel({self.animate_over: window}).values
+            self._start = i
+        return self._window[i - self._start]
+
+
+class _LazyPcolormesh(amp.blocks.Block):
+    """Animates a pcolormesh, loading each frame from a _FrameLoader when it is drawn"""
+
+    def __init__(self, x_values, y_values, frames, ax=None, **kwargs):
+        super().__init__(ax, t_axis=0)
+        self.frames = frames
+        self.quad = self.ax.pcolormesh(x_values, y_values, frames[0], **kwargs)
+
+    def _update(self, i):
+        self.quad.set_array(self.frames[i])
+        return self.quad
+
+    def __len__(self):
+        return len(self.frames)
+
+
+def _uniform_extent(x_values, y_values):
+    """Return the extent (left, right, bottom, top) of the cells around the points
+    of a uniform rectilinear grid, None if the grid is not uniform or decreasing"""
+    edges = []
+    for values in (x_values, y_values):
+        values = np.asarray(values, dtype=float)
+        if values.ndim != 1 or len(values) < 2:
+            return None
+        spacing = np.diff(values)
+        if spacing[0] <= 0 or not np.allclose(spacing, spacing[0], rtol=1e-6, atol=0):
+            return None
+        half = (values[-1] - values[0]) / (len(values) - 1) / 2
+        edges.extend([values[0] - half, values[-1] + half])
+    return tuple(edges)
+
+
+class _Image(amp.blocks.Block):
+    """Animates the frames of a uniform grid as image.
+
+    Drawing an image is much cheaper than drawing a pcolormesh with one polygon per
+    cell, and each frame only replaces the pixel data of the same AxesImage. The
+    frames can be a 3d array with time as first axis or a _FrameLoader.
+    """
+
+    def __init__(self, extent, frames, ax=None, **kwargs):
+        super().__init__(ax, t_axis=0)
+        self.frames = frames
+        kwargs.setdefault("interpolation", "nearest")
+        kwargs.setdefault("aspect", self.ax.get_aspect())
+        self.image = self.ax.imshow(frames[0], origin="lower", extent=extent, **kwargs)
+
+    def _update(self, i):
+        self.image.set_data(self.frames[i])
+        return self.image
+
+    def __len__(self):
+        return len(self.frames)
+
+
+def _mappable(block):
+    """Return the color mapped artist of a pcolormesh or image block"""
+    return block.image if isinstance(block, _Image) else block.quad
+
+
+class _LazyLine(amp.blocks.Block):
+    """Animates a line, loading each frame from a _FrameLoader when it is drawn"""
+
+    def __init__(self, x_values, frames, ax=None, **kwargs):
+        super().__init__(ax, t_axis=0)
+        self.frames = frames
+        (self.line,) = self.ax.plot(x_values, frames[0], **kwargs)
+
+    def _update(self, i):
+        self.line.set_ydata(self.frames[i])
+        return self.line
+
+    def __len__(self):
+        return len(self.frames)
+
+
+@instrumented("plotting.animate_pcolormesh")
 def animate_pcolormesh(
     data,
     animate_over="time",
@@ -94,6 +369,7 @@ def animate_pcolormesh(
     vmin=None,
     vmax=None,
     vsymmetric=False,
+    robust=False,
     logscale=False,
     fps=10,
     save_as=None,
@@ -102,6 +378,17 @@ def animate_pcolormesh(
     aspect="auto",
     extend=None,
     controls="both",
+    lazy=False,
+    prefetch=4,
+    processes=None,
+    writer="pillow",
+    downsample=True,
+    downsample_method="mean",
+    t_start=None,
+    t_end=None,
+    time_stride=None,
+    max_frames=None,
+    renderer="auto",
     **kwargs,
 ):
     """
@@ -139,6 +426,9 @@ def animate_pcolormesh(
         data across whole timeseries.
     vsymmetric : bool, optional
         If set to true, make the color-scale symmetric
+    robust : bool, optional
+        If set to true, use the 2nd and 98th percentiles of the data instead of its
+        minimum and maximum as default color limits
     logscale : bool or float, optional
         If True, default to a logarithmic color scale instead of a linear one.
         If a non-bool type is passed it is treated as a float used to set the linear
@@ -148,9 +438,12 @@ def animate_pcolormesh(
     fps : int, optional
         Frames per second of resulting gif
     save_as : True or str, optional
-        If str is passed, save the animation as save_as+'.gif'.
+        If str is passed, save the animation as save_as+'.gif' (or the extension
+        of the selected writer).
         If True is passed, save the animation with a default name,
         '<variable name>_over_<animate_over>.gif'
+        The size and timings of the saved file are stored as dict in the
+        export_report attribute of the animation, see export.save_animation.
     ax : Axes, optional
         A matplotlib axes instance to plot to. If None, create a new
         figure and axes, and plot to that
@@ -165,14 +458,53 @@ def animate_pcolormesh(
         By default, add both the timeline and play/pause toggle to the animation. If
         "timeline" is passed add only the timeline, if "toggle" is passed add only the
         play/pause toggle. If None or an empty string is passed, add neither.
+    lazy : bool, optional
+        If set to true, do not load the whole time series into memory. Instead each
+        frame is read from the (dask-backed) data when it is drawn, so the memory
+        needed is bounded by a few frames whatever the length of the run.
+    prefetch : int, optional
+        Number of consecutive frames read at once if lazy is True
+    processes : int, optional
+        If passed together with save_as, the frames are rendered in parallel by this
+        many processes (see xfeltor.export.save_parallel). Each process reads only
+        the frames it renders. Requires ax (and cax) to be None.
+    writer : str, optional
+        "pillow" saves a gif with Pillow. "mp4" and "webm" stream the frames into
+        ffmpeg and fall back to "pillow" if ffmpeg is not installed. "auto" selects
+        "mp4" if ffmpeg is installed and "pillow" otherwise.
+    downsample : bool, int or dict, optional
+        If True, coarsen the spatial dimensions to roughly the resolution of the axes
+        in pixels, if the data has more cells than that. An int coarsens both
+        dimensions by this factor, a dict gives the factor for each dimension. Pass
+        False to plot the data at full resolution.
+    downsample_method : str, optional
+        "mean" replaces each block of cells by its mean, "extrema" by the block's
+        minimum or maximum, whichever deviates more from the mean. "extrema"
+        preserves the peaks of small structures.
+    t_start : float, optional
+        First value of animate_over to animate. The frames are selected lazily,
+        before any data is loaded.
+    t_end : float, optional
+        Last value of animate_over to animate
+    time_stride : int, optional
+        Animate only every time_stride-th frame
+    max_frames : int, optional
+        Increase time_stride such that at most max_frames frames are animated
+    renderer : str, optional
+        "image" draws the frames with imshow, replacing only the pixel data of the
+        image for each frame, which requires uniformly spaced 1d x and y
+        coordinates. "pcolormesh" draws them with pcolormesh, which supports any
+        grid. "auto" selects "image" for uniform grids and "pcolormesh" otherwise.
     kwargs : dict, optional
         Additional keyword arguments are passed on to the animation function
-        animatplot.blocks.Pcolormesh
+        animatplot.blocks.Pcolormesh, or matplotlib's imshow for the "image"
+        renderer
     Returns
     -------
     animation or block
         If animate==True, returns an animatplot.Animation object, otherwise
-        returns an animatplot.blocks.Pcolormesh instance.
+        returns the block, an animatplot.blocks.Pcolormesh instance or an image
+        block with the AxesImage as attribute image.
     """
 
     variable = data.name
@@ -205,6 +537,8 @@ def animate_pcolormesh(
             raise ValueError(f"Dimension {x} is not present in the data")
         y = spatial_dims[0]
 
+    data = _select_frames(data, animate_over, t_start, t_end, time_stride, max_frames)
+
     if extend is None:
         # Replicate default for older matplotlib that does not handle extend=None
         # matplotlib-3.3 definitely does not need this. Not sure about 3.0, 3.1, 3.2.
@@ -214,30 +548,70 @@ def animate_pcolormesh(
     y_values, y_label = _parse_coord_option(y, axis_coords, data)
 
     data = data.transpose(animate_over, y, x, transpose_coords=True)
-    # Load values eagerly otherwise for some reason the plotting takes
-    # 100's of times longer - for some reason animatplot does not deal
-    # well with dask arrays!
-    image_data = data.values
-
-    # If not specified, determine max and min values across entire data series
-    if vmax is None:
-        vmax = np.max(image_data)
-    if vmin is None:
-        vmin = np.min(image_data)
-    if vsymmetric:
-        vmax = max(np.abs(vmin), np.abs(vmax))
-        vmin = -vmax
-    kwargs["norm"] = _create_norm(logscale, kwargs.get("norm", None), vmin, vmax)
+
+    if (
+        save_as is not None
+        and processes is not None
+        and (ax is not None or cax is not None)
+    ):
+        raise ValueError("ax and cax cannot be passed when rendering in parallel")
+    # The workers render the frames, so this process only reads the color limits
+    # and the first frame
+    lazy = lazy or (save_as is not None and processes is not None and animate)
 
     if not ax:
         fig, ax = plt.subplots()
 
+    # Coarsen the data if it has more cells than the axes has pixels
+    full_data = data
+    factors = _downsample_factors(data, x, y, ax, downsample)
+    if factors:
+        data = _coarsen(data, factors, downsample_method)
+        x_values = _coarsen_coord(x_values, factors.get(x, 1))
+        y_values = _coarsen_coord(y_values, factors.get(y, 1))
+
+    if lazy:
+        image_data = _FrameLoader(data, animate_over, prefetch)
+    else:
+        # Load values eagerly otherwise for some reason the plotting takes
+        # 100's of times longer - for some reason animatplot does not deal
+        # well with dask arrays!
+        with stage("plotting.read"):
+            image_data = data.values
+
+    # If not specified, determine max and min values across entire data series.
+    # Loaded data is reduced in memory, otherwise the limits of a dask-backed
+    # array are found chunk by chunk in one pass before any frame is loaded
+    if (vmin is None or vmax is None) and (
+        vsymmetric or logscale or kwargs.get("norm", None) is None
+    ):
+        data_min, data_max = _find_limits(data if lazy else image_data, robust=robust)
+        vmin = data_min if vmin is None else vmin
+        vmax = data_max if vmax is None else vmax
+
+    if vsymmetric:
+        vmax = max(np.abs(vmin), np.abs(vmax))
+        vmin = -vmax
+    # The norm is attached to this figure, so it is not passed on to the workers of
+    # a parallel export, which create their own from logscale, vmin and vmax
+    block_kwargs = dict(
+        kwargs, norm=_create_norm(logscale, kwargs.get("norm", None), vmin, vmax)
+    )
+
     ax.set_aspect(aspect)
 
+    if renderer not in ["auto", "image", "pcolormesh"]:
+        raise ValueError(f"Unrecognised value for renderer={renderer}")
+    extent = None
+    if renderer != "pcolormesh" and "shading" not in kwargs:
+        extent = _uniform_extent(x_values, y_values)
+    if renderer == "image" and extent is None:
+        raise ValueError("The image renderer requires uniformly spaced 1d x and y")
+
     # Note: animatplot's Pcolormesh gave strange outputs without passing
     # explicitly x- and y-value arrays, although in principle these should not
     # be necessary.
-    with warnings.catch_warnings():
+    with warnings.catch_warnings(), stage("plotting.build"):
         # The coordinates we pass are a logically rectangular grid, so should be fine
         # even if this warning is triggered by pcolor or pcolormesh
         warnings.filterwarnings(
@@ -248,14 +622,21 @@ def animate_pcolormesh(
             "cell edges to pcolormesh.",
             UserWarning,
         )
-        pcolormesh_block = amp.blocks.Pcolormesh(
-            x_values,
-            y_values,
-            image_data,
-            ax=ax,
-            **kwargs,
-            # shading parameter triggers error when trying to set manually
-        )
+        if extent is not None:
+            pcolormesh_block = _Image(extent, image_data, ax=ax, **block_kwargs)
+        elif lazy:
+            pcolormesh_block = _LazyPcolormesh(
+                x_values, y_values, image_data, ax=ax, **block_kwargs
+            )
+        else:
+            pcolormesh_block = amp.blocks.Pcolormesh(
+                x_values,
+                y_values,
+                image_data,
+                ax=ax,
+                **block_kwargs,
+                # shading parameter triggers error when trying to set manually
+            )
 
     if animate:
         t_values, t_label = _parse_coord_option(animate_over, axis_coords, data)
@@ -264,7 +645,7 @@ def animate_pcolormesh(
         timeline = amp.Timeline(t_values, fps=fps, units=t_suffix)
         anim = amp.Animation([pcolormesh_block], timeline)
 
-    cbar = plt.colorbar(pcolormesh_block.quad, ax=ax, cax=cax, extend=extend)
+    cbar = plt.colorbar(_mappable(pcolormesh_block), ax=ax, cax=cax, extend=extend)
     cbar_label = data.long_name if "long_name" in data.attrs else variable
     if "units" in data.attrs:
         cbar_label += f" [{data.units}]"
@@ -281,11 +662,41 @@ def animate_pcolormesh(
         if save_as is not None:
             if save_as is True:
                 save_as = f"{variable}_over_{animate_over}"
-            anim.save(save_as + ".gif", writer=PillowWriter(fps=fps))
+            if processes is None:
+                anim.export_report = save_animation(anim, save_as, fps, writer)
+            else:
+                # The color limits are fixed already, so that the workers do not
+                # have to scan the data again
+                build = partial(
+                    animate_pcolormesh,
+                    full_data,
+                    animate_over=animate_over,
+                    x=x,
+                    y=y,
+                    axis_coords=axis_coords,
+                    vmin=vmin,
+                    vmax=vmax,
+                    logscale=logscale,
+                    vsymmetric=vsymmetric,
+                    downsample=factors,
+                    downsample_method=downsample_method,
+                    fps=fps,
+                    aspect=aspect,
+                    extend=extend,
+                    controls=controls,
+                    lazy=True,
+                    prefetch=prefetch,
+                    renderer=renderer,
+                    **kwargs,
+                )
+                anim.export_report = save_parallel(
+                    build, len(pcolormesh_block), save_as, fps, processes, writer
+                )
         return anim
     return pcolormesh_block
 
 
+@instrumented("plotting.animate_line")
 def animate_line(
     data,
     animate_over=None,
@@ -298,6 +709,14 @@ def animate_line(
     ax=None,
     aspect=None,
     controls="both",
+    lazy=False,
+    prefetch=4,
+    processes=None,
+    writer="pillow",
+    t_start=None,
+    t_end=None,
+    time_stride=None,
+    max_frames=None,
     **kwargs,
 ):
     """
@@ -328,9 +747,12 @@ def animate_line(
     fps : int, optional
         Frames per second of resulting gif
     save_as : True or str, optional
-        If str is passed, save the animation as save_as+'.gif'.
+        If str is passed, save the animation as save_as+'.gif' (or the extension
+        of the selected writer).
         If True is passed, save the animation with a default name,
         '<variable name>_over_<animate_over>.gif'
+        The size and timings of the saved file are stored as dict in the
+        export_report attribute of the animation, see export.save_animation.
     ax : Axes, optional
         A matplotlib axes instance to plot to. If None, create a new
         figure and axes, and plot to that
@@ -340,6 +762,28 @@ def animate_line(
         By default, add both the timeline and play/pause toggle to the animation. If
         "timeline" is passed add only the timeline, if "toggle" is passed add only the
         play/pause toggle. If None or an empty string is passed, add neither.
+    lazy : bool, optional
+        If set to true, do not load the whole time series into memory. Instead each
+        frame is read from the (dask-backed) data when it is drawn.
+    prefetch : int, optional
+        Number of consecutive frames read at once if lazy is True
+    processes : int, optional
+        If passed together with save_as, the frames are rendered in parallel by this
+        many processes (see xfeltor.export.save_parallel). Each process reads only
+        the frames it renders. Requires ax (and cax) to be None.
+    writer : str, optional
+        "pillow" saves a gif with Pillow. "mp4" and "webm" stream the frames into
+        ffmpeg and fall back to "pillow" if ffmpeg is not installed. "auto" selects
+        "mp4" if ffmpeg is installed and "pillow" otherwise.
+    t_start : float, optional
+        First value of animate_over to animate. The frames are selected lazily,
+        before any data is loaded.
+    t_end : float, optional
+        Last value of animate_over to animate
+    time_stride : int, optional
+        Animate only every time_stride-th frame
+    max_frames : int, optional
+        Increase time_stride such that at most max_frames frames are animated
     kwargs : dict, optional
         Additional keyword arguments are passed on to the plotting function
         animatplot.blocks.Line
@@ -356,20 +800,35 @@ def animate_line(
     if aspect is None:
         aspect = "auto"
 
+    data = _select_frames(data, animate_over, t_start, t_end, time_stride, max_frames)
+
     variable = data.name
 
-    _, x = data.dims
+    (x,) = (dim for dim in data.dims if dim != animate_over)
+
+    data = data.transpose(animate_over, x, transpose_coords=True)
 
-    # Load values eagerly otherwise for some reason the plotting takes
-    # 100's of times longer - for some reason animatplot does not deal
-    # well with dask arrays!
-    image_data = data.values
+    if save_as is not None and processes is not None and ax is not None:
+        raise ValueError("ax cannot be passed when rendering in parallel")
+    # The workers render the frames, so this process only reads the limits and the
+    # first frame
+    lazy = lazy or (save_as is not None and processes is not None and animate)
 
-    # If not specified, determine max and min values across entire data series
-    if vmax is None:
-        vmax = np.max(image_data)
-    if vmin is None:
-        vmin = np.min(image_data)
+    if lazy:
+        image_data = _FrameLoader(data, animate_over, prefetch)
+    else:
+        # Load values eagerly otherwise for some reason the plotting takes
+        # 100's of times longer - for some reason animatplot does not deal
+        # well with dask arrays!
+        with stage("plotting.read"):
+            image_data = data.values
+
+    # If not specified, determine max and min values across entire data series,
+    # from the loaded values or chunk by chunk for lazy animations
+    if vmin is None or vmax is None:
+        data_min, data_max = _find_limits(data if lazy else image_data)
+        vmin = data_min if vmin is None else vmin
+        vmax = data_max if vmax is None else vmax
 
     x_values, x_label = _parse_coord_option(x, axis_coords, data)
 
@@ -381,7 +840,11 @@ def animate_line(
     # set range of plot
     ax.set_ylim([vmin, vmax])
 
-    line_block = amp.blocks.Line(x_values, image_data, ax=ax, **kwargs)
+    with stage("plotting.build"):
+        if lazy:
+            line_block = _LazyLine(x_values, image_data, ax=ax, **kwargs)
+        else:
+            line_block = amp.blocks.Line(x_values, image_data, ax=ax, **kwargs)
 
     if animate:
         t_values, t_label = _parse_coord_option(animate_over, axis_coords, data)
@@ -404,7 +867,26 @@ def animate_line(
         if save_as is not None:
             if save_as is True:
                 save_as = f"{variable}_over_{animate_over}"
-            anim.save(save_as + ".gif", writer=PillowWriter(fps=fps))
+            if processes is None:
+                anim.export_report = save_animation(anim, save_as, fps, writer)
+            else:
+                build = partial(
+                    animate_line,
+                    data,
+                    animate_over=animate_over,
+                    axis_coords=axis_coords,
+                    vmin=vmin,
+                    vmax=vmax,
+                    fps=fps,
+                    aspect=aspect,
+                    controls=controls,
+                    lazy=True,
+                    prefetch=prefetch,
+                    **kwargs,
+                )
+                anim.export_report = save_parallel(
+                    build, len(line_block), save_as, fps, processes, writer
+                )
 
         return anim
 
@@ -0,0 +1,57 @@
+import numpy as np
+import xarray as xr
+from .interpolate import interpolate
+
+
+def _probe_positions(positions, dim):
+    """Return the positions as dict of DataArrays along dim"""
+    if isinstance(positions, xr.Dataset):
+        positions = {name: positions[name] for name in positions.data_vars}
+    points = {}
+    for name, values in positions.items():
+        if not isinstance(values, xr.DataArray):
+            values = xr.DataArray(np.asarray(values, dtype=float), dims=dim)
+        points[name] = values
+    lengths = {values.sizes.get(dim) for values in points.values()}
+    if len(lengths) != 1 or None in lengths:
+        raise ValueError(f"All probe positions need the same length along {dim}")
+    return points
+
+
+def probes(
+    ds,
+    positions,
+    variables=None,
+    method="nearest",
+    n=None,
+    dim="probe",
+    save_as=None,
+    load=True,
+):
+    """Extract the time series of many probes at once, see
+    FeltorDatasetAccessor.probes"""
+    if variables is not None:
+        ds = ds[list(variables)]
+    points = _probe_positions(positions, dim)
+
+    if method == "nearest":
+        result = ds.sel(points, method="nearest")
+    elif method == "dg":
+        result = interpolate(ds, n, points)
+    else:
+        raise ValueError(f'method must be "nearest" or "dg", not {method}')
+
+    # Variables without the spatial dimensions, e.g. global time series
+    result = result[[name for name in result.data_vars if dim in result[name].dims]]
+    result = result.transpose(dim, ...)
+
+    if save_as is not None:
+        for variable in result.variables.values():
+            variable.encoding = {}
+        # Computes the chunks one by one while writing them
+        result.to_netcdf(save_as)
+        return xr.open_dataset(save_as, decode_times=False)
+    if load:
+        # One computation for all variables, so that every chunk is read once
+        result = result.compute()
+    return result
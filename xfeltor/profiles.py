@@ -0,0 +1,69 @@
+import numpy as np
+import xarray as xr
+from .derivatives import gradient
+
+
+def _average_dims(da, radial, average_over):
+    """Return the dimensions of da to average over, by default all except radial"""
+    if average_over is None:
+        return [dim for dim in da.dims if dim != radial]
+    if isinstance(average_over, str):
+        return [average_over]
+    return list(average_over)
+
+
+def radial_profiles(ds, variables, radial="x", average_over=None, load=True):
+    """Mean profiles and fluctuation levels, see
+    FeltorDatasetAccessor.radial_profiles"""
+    if isinstance(variables, str):
+        variables = [variables]
+    result = xr.Dataset()
+    for name in variables:
+        da = ds[name].astype(float)
+        dims = _average_dims(da, radial, average_over)
+        # Mean and mean square come from the same chunks, so the fluctuations
+        # n - <n> are never formed
+        mean = da.mean(dims)
+        mean_square = (da**2).mean(dims)
+        result[name] = mean
+        result[f"{name}_std"] = np.sqrt(np.maximum(mean_square - mean**2, 0))
+    if load:
+        result = result.compute()
+    return result
+
+
+def radial_flux(
+    ds,
+    density="electrons",
+    potential="potential",
+    radial="x",
+    poloidal="y",
+    average_over=None,
+    n=1,
+    boundary="periodic",
+    load=True,
+):
+    """Radial E x B particle flux, see FeltorDatasetAccessor.radial_flux"""
+    n_e = ds[density].astype(float)
+    # v_E = z x grad(phi) / B with B = 1 in FELTOR units
+    velocity = -gradient(ds[potential], poloidal, n, boundary)
+
+    mean_density = n_e.mean(_average_dims(n_e, radial, average_over))
+    mean_velocity = velocity.mean(_average_dims(velocity, radial, average_over))
+    product = n_e * velocity
+    flux = product.mean(_average_dims(product, radial, average_over))
+    result = xr.Dataset(
+        {
+            "flux": flux,
+            "fluctuation_flux": flux - mean_density * mean_velocity,
+            "density": mean_density,
+            "velocity": mean_velocity,
+        }
+    )
+    result["flux"].attrs["long_name"] = f"<{density} v_E>"
+    result["fluctuation_flux"].attrs["long_name"] = f"<{density}~ v_E~>"
+    result["velocity"].attrs["long_name"] = f"radial E x B velocity, -d{poloidal}"
+    if load:
+        # One pass over the data for all moments
+        result = result.compute()
+    return result
@@ -0,0 +1,193 @@
+import os
+import time
+import glob
+import logging
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import matplotlib.pyplot as plt
+from natsort import natsorted
+from .export import _resolve_writer
+from .instrument import profile
+from .load import open_feltordataset
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_variable(spec):
+    """Parse a variable given as "name" or "name:dim=index,..." into the name and
+    the dict of indices to select, e.g. "ions:y=100" """
+    name, _, selection = spec.partition(":")
+    indices = {}
+    if selection:
+        for item in selection.split(","):
+            dim, _, index = item.partition("=")
+            indices[dim.strip()] = int(index)
+    return name.strip(), indices
+
+
+def _find_runs(runs, pattern="*.nc"):
+    """Return the list of files of each run.
+
+    Every directory matching one of the globs in runs is one run consisting of its
+    files matching pattern. All files matching one glob form one (restarted) run.
+    """
+    found = []
+    for run in runs:
+        matches = natsorted(glob.glob(os.fspath(run)))
+        directories = [path for path in matches if os.path.isdir(path)]
+        files = [path for path in matches if os.path.isfile(path)]
+        for directory in directories:
+            paths = natsorted(glob.glob(os.path.join(directory, pattern)))
+            if paths:
+                found.append(paths)
+        if files:
+            found.append(files)
+        if not matches:
+            raise OSError(f"no runs matching {run}")
+    return found
+
+
+def _output_name(paths, output):
+    """Fill in the run's directory {dir} and its name {run} into output"""
+    directory = os.path.dirname(os.path.abspath(paths[0]))
+    return output.format(dir=directory, run=os.path.basename(directory))
+
+
+def _up_to_date(filename, paths):
+    """Return True if filename exists and is newer than all files of the run"""
+    if not os.path.exists(filename):
+        return False
+    return os.path.getmtime(filename) >= max(os.path.getmtime(p) for p in paths)
+
+
+def _render_job(paths, variables, save_as, chunks, kwargs):
+    """Worker function: open one run and save the animate_list animation of the
+    variables. Returns a dict with the timings of the job."""
+    start = time.perf_counter()
+    with profile() as report:
+        ds = open_feltordataset(paths, chunks=chunks)
+        try:
+            selected = []
+            for spec in variables:
+                name, indices = _parse_variable(spec)
+                selected.append(ds[name].isel(indices))
+            anim = ds.feltor.animate_list(selected, save_as=save_as, **kwargs)
+            frames = len(anim.timeline)
+        finally:
+            plt.close("all")
+            ds.close()
+    summary = report.summary()
+    return {
+        "frames": frames,
+        "seconds": time.perf_counter() - start,
+        "open_seconds": summary["open_feltordataset"]["seconds"],
+        "save_seconds": summary["export.save"]["seconds"],
+    }
+
+
+def _init_worker():
+    """Worker initializer: render with the Agg backend, without a display"""
+    plt.switch_backend("Agg")
+
+
+def render_runs(
+    runs,
+    variables,
+    output="{dir}/animation",
+    pattern="*.nc",
+    processes=None,
+    force=False,
+    chunks=None,
+    writer="pillow",
+    **kwargs,
+):
+    """Render the animate_list animation of the same variables for many runs in a
+    pool of processes with the Agg backend, e.g.
+
+    render_runs(["runs/*/"], ["electrons", "ions:y=100", "potential"])
+
+    Parameters
+    ----------
+    runs : list of str
+        Globs of runs. Every matching directory is one run consisting of its files
+        matching pattern, all files matching one glob form one restarted run.
+    variables : list of str
+        Variables to animate. "name:dim=index,..." selects an index along dim,
+        e.g. "ions:y=100" animates the 1d profile at y index 100.
+    output : str, optional
+        Name of the file to create for each run, without the file extension.
+        "{dir}" is replaced by the directory of the run and "{run}" by its name.
+    pattern : str, optional
+        Glob of the files of a run within its directory
+    processes : int, optional
+        Number of runs rendered at the same time, defaults to the number of CPUs
+    force : bool, optional
+        If False, skip runs whose animation is newer than all files of the run
+    chunks : dict, optional
+        Passed on to open_feltordataset
+    writer : str, optional
+        "pillow", "mp4", "webm" or "auto", see xfeltor.export.save_animation
+    kwargs : dict, optional
+        Passed on to FeltorDatasetAccessor.animate_list, e.g. nrows, ncols, fps or
+        max_frames
+
+    Returns
+    -------
+    list of dict
+        For each run its "paths", the "filename" of the animation, its "status"
+        ("rendered", "skipped" or "failed"), the "error" of a failed run and the
+        timings in "seconds", "open_seconds" and "save_seconds" of a rendered run
+    """
+    file_format = _resolve_writer(writer)
+    jobs = []
+    for paths in _find_runs(runs, pattern):
+        save_as = _output_name(paths, output)
+        job = {"paths": paths, "filename": f"{save_as}.{file_format}"}
+        if not force and _up_to_date(job["filename"], paths):
+            job["status"] = "skipped"
+            logger.info("skipped %s (up to date)", job["filename"])
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(save_as)), exist_ok=True)
+        jobs.append((job, save_as))
+
+    if processes is None:
+        processes = os.cpu_count()
+    todo = [(job, save_as) for job, save_as in jobs if "status" not in job]
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max(1, min(processes, len(todo) or 1)),
+        mp_context=context,
+        initializer=_init_worker,
+    ) as pool:
+        futures = {
+            pool.submit(
+                _render_job,
+                job["paths"],
+                variables,
+                save_as,
+                chunks,
+                dict(kwargs, writer=writer),
+            ): job
+            for job, save_as in todo
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                job.update(future.result(), status="rendered")
+            except Exception as error:
+                job.update(
+                    status="failed",
+                    error="".join(traceback.format_exception_only(error)).strip(),
+                )
+                logger.error("failed %s: %s", job["filename"], job["error"])
+                continue
+            logger.info(
+                "rendered %s (%d frames) in %.2f s (open %.2f s, save %.2f s)",
+                job["filename"],
+                job["frames"],
+                job["seconds"],
+                job["open_seconds"],
+                job["save_seconds"],
+            )
+    return [job for job, _ in jobs]
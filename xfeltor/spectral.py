@@ -0,0 +1,160 @@
+import numpy as np
+import xarray as xr
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _window(window, n):
+    """Return the periodic window of length n, like scipy.signal.get_window"""
+    if window is None or (isinstance(window, str) and window == "boxcar"):
+        return np.ones(n)
+    if not isinstance(window, str):
+        window = np.asarray(window, dtype=float)
+        if window.shape != (n,):
+            raise ValueError(f"The window must have length {n}")
+        return window
+    phase = 2 * np.pi * np.arange(n) / n
+    if window == "hann":
+        return 0.5 - 0.5 * np.cos(phase)
+    if window == "hamming":
+        return 0.54 - 0.46 * np.cos(phase)
+    if window == "blackman":
+        return 0.42 - 0.5 * np.cos(phase) + 0.08 * np.cos(2 * phase)
+    raise ValueError(
+        f'window must be "hann", "hamming", "blackman", "boxcar" or an array, '
+        f"not {window}"
+    )
+
+
+def _detrend(values, detrend):
+    """Remove the mean ("constant") or a least squares line ("linear") along the
+    last axis"""
+    if detrend is None:
+        return values
+    if detrend == "constant":
+        return values - values.mean(axis=-1, keepdims=True)
+    if detrend == "linear":
+        t = np.arange(values.shape[-1]) - (values.shape[-1] - 1) / 2
+        slope = (values * t).sum(axis=-1, keepdims=True) / (t**2).sum()
+        return values - values.mean(axis=-1, keepdims=True) - slope * t
+    raise ValueError(f'detrend must be "constant", "linear" or None, not {detrend}')
+
+
+def _periodogram(values, spacing, window, detrend):
+    """One-sided power spectral density of the last axis of values"""
+    w = _window(window, values.shape[-1])
+    transformed = np.fft.rfft(_detrend(values, detrend) * w, axis=-1)
+    power = np.abs(transformed) ** 2 * spacing / (w**2).sum()
+    # Add the power of the negative frequencies, except for zero and Nyquist
+    power[..., 1:] *= 2
+    if values.shape[-1] % 2 == 0:
+        power[..., -1] /= 2
+    return power
+
+
+def _median_bias(n):
+    """Bias of the median of n periodograms compared to their mean"""
+    odd = 2 * np.arange(1, (n - 1) // 2 + 1)
+    return 1 + np.sum(1.0 / (odd + 1) - 1.0 / odd)
+
+
+def _welch(values, spacing, nperseg, noverlap, window, detrend, average):
+    """Welch estimate of the power spectral density of the last axis of values"""
+    segments = sliding_window_view(values, nperseg, axis=-1)
+    segments = segments[..., :: nperseg - noverlap, :]
+    power = _periodogram(segments, spacing, window, detrend)
+    if average == "mean":
+        return power.mean(axis=-2)
+    if average == "median":
+        return np.median(power, axis=-2) / _median_bias(segments.shape[-2])
+    raise ValueError(f'average must be "mean" or "median", not {average}')
+
+
+def _spacing(da, dim):
+    """Return the spacing of the equidistant coordinate dim"""
+    if dim not in da.coords:
+        return 1.0
+    steps = np.diff(da[dim].values.astype(float))
+    if len(steps) == 0:
+        return 1.0
+    if not np.allclose(steps, steps[0], rtol=1e-3, atol=0):
+        raise ValueError(
+            f"The coordinate {dim} is not equidistant. Interpolate the data to an "
+            f"equidistant grid first, e.g. with ds.feltor.interpolate()."
+        )
+    return steps.mean()
+
+
+def _apply_along(da, dim, func, length, spacing, **kwargs):
+    """Apply func to the last axis along dim, replacing dim by the frequencies
+    freq_<dim> of a spectrum of length samples"""
+    freq_dim = f"freq_{dim}"
+    frequencies = np.fft.rfftfreq(length, spacing)
+    result = xr.apply_ufunc(
+        func,
+        da,
+        kwargs=dict(spacing=spacing, **kwargs),
+        input_core_dims=[[dim]],
+        output_core_dims=[[freq_dim]],
+        exclude_dims={dim},
+        dask="parallelized",
+        output_dtypes=[float],
+        dask_gufunc_kwargs={
+            "output_sizes": {freq_dim: len(frequencies)},
+            "allow_rechunk": True,
+        },
+    )
+    result = result.assign_coords({freq_dim: frequencies})
+    result[freq_dim].attrs["long_name"] = f"frequency of {dim}"
+    return result
+
+
+def spectrum(da, dim, window="hann", detrend="constant", average_over=None):
+    """Power spectral density along dim, see FeltorDataArrayAccessor.spectrum"""
+    spacing = _spacing(da, dim)
+    result = _apply_along(
+        da,
+        dim,
+        _periodogram,
+        da.sizes[dim],
+        spacing,
+        window=window,
+        detrend=detrend,
+    )
+    if average_over is not None:
+        result = result.mean(average_over)
+    return result
+
+
+def psd(
+    da,
+    dim="time",
+    nperseg=256,
+    noverlap=None,
+    window="hann",
+    detrend="constant",
+    average="mean",
+    average_over=None,
+):
+    """Welch estimate of the power spectral density along dim, see
+    FeltorDataArrayAccessor.psd"""
+    nperseg = min(nperseg, da.sizes[dim])
+    if noverlap is None:
+        noverlap = nperseg // 2
+    if not 0 <= noverlap < nperseg:
+        raise ValueError("noverlap must be at least 0 and less than nperseg")
+    spacing = _spacing(da, dim)
+    result = _apply_along(
+        da,
+        dim,
+        _welch,
+        nperseg,
+        spacing,
+        nperseg=nperseg,
+        noverlap=noverlap,
+        window=window,
+        detrend=detrend,
+        average=average,
+    )
+    if average_over is not None:
+        result = result.mean(average_over)
+    return result